@@ -0,0 +1,141 @@
+"""
+Compare the single-pass cleaner (merge_and_clean.clean_content) with the
+previous multi-pass implementation: both must produce identical HTML.
+Besides the whole clean_content call (parse + rules + render), the rules are
+timed on their own on already parsed trees, since parsing and rendering cost
+the same for both.
+
+Contents are read from the debug dumps in a directory (default: raw/*.json).
+A synthetic RaceFans-like article is used when none is found.
+
+Usage:
+    python bench_clean_data.py [fixture_dir]
+"""
+
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+from html_parser import parse_fragment, render_fragment
+from merge_and_clean import apply_clean_rules, clean_content
+
+FIXTURE_DIR = sys.argv[1] if len(sys.argv) > 1 else "raw"
+ROUNDS = 3
+
+
+def legacy_clean_rules(soup):
+    """
+    The multi-pass cleaning from before CleanRules: one find_all per rule.
+    """
+    for tag_name in [
+        "span",
+        "strong",
+        "em",
+        "section",
+        "small",
+        "figcaption",
+        "img",
+        "figure",
+        "script",
+        "h4",
+    ]:
+        for tag in soup.find_all(tag_name):
+            tag.decompose()
+
+    class_selectors = {
+        "ul": ["lcp_catlist"],
+        "div": ["tnp", "tnp-subscription", "alignright"],
+        "p": ["text-above-ad"],
+    }
+    for tag_name, class_list in class_selectors.items():
+        for class_name in class_list:
+            for tag in soup.find_all(tag_name, class_=lambda x: x and class_name in x):
+                tag.decompose()
+
+    for tag in soup.find_all(id=lambda x: x and x.startswith("article-mpu")):
+        tag.decompose()
+    for tag in soup.find_all(id=lambda x: x and "snack_dex" in x):
+        tag.decompose()
+
+    for a_tag in soup.find_all("a"):
+        b_tag = soup.new_tag("b")
+        b_tag.string = a_tag.get_text()
+        a_tag.replace_with(b_tag)
+
+    for text in [
+        "Become a RaceFans supporter",
+        "Go ad-free for just £1 per month",
+        "Find out more and sign up",
+    ]:
+        for text_node in soup.find_all(string=True):
+            if text in text_node:
+                text_node.replace_with(text_node.replace(text, ""))
+
+
+def legacy_clean_content(html):
+    soup = parse_fragment(html)
+    legacy_clean_rules(soup)
+    return render_fragment(soup)
+
+
+def load_contents(fixture_dir):
+    contents = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            contents.extend(
+                item["content"] for item in json.load(f) or [] if item.get("content")
+            )
+    if not contents:
+        paragraph = (
+            '<p>Lando Norris <a href="/drivers/norris">took pole</a> by <strong>0.1s</strong>'
+            '<span class="x">ad</span> at <em>Suzuka</em>.</p>'
+            '<div class="alignright"><img src="a.png"><a href="#">Photo</a></div>'
+            '<div id="snack_dex3"><p>sponsored</p></div>'
+            "<p>Become a RaceFans supporter - Go ad-free for just £1 per month. "
+            '<a href="/s">Find out more and sign up</a></p>'
+        )
+        contents.append("\n".join([paragraph] * 300))
+    return contents
+
+
+def timed(clean, contents):
+    start = time.perf_counter()
+    results = []
+    for _ in range(ROUNDS):
+        results = [clean(content) for content in contents]
+    return results, (time.perf_counter() - start) / (ROUNDS * len(contents)) * 1000
+
+
+def timed_rules(apply_rules, contents):
+    soups = [parse_fragment(content) for _ in range(ROUNDS) for content in contents]
+    start = time.perf_counter()
+    for soup in soups:
+        apply_rules(soup)
+    return (time.perf_counter() - start) / len(soups) * 1000
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    contents = load_contents(FIXTURE_DIR)
+    legacy_results, legacy_ms = timed(legacy_clean_content, contents)
+    results, ms = timed(clean_content, contents)
+    _, parse_ms = timed(parse_fragment, contents)
+
+    legacy_rules_ms = timed_rules(legacy_clean_rules, contents)
+    rules_ms = timed_rules(apply_clean_rules, contents)
+
+    mismatches = sum(a != b for a, b in zip(legacy_results, results))
+    print(f"{len(contents)} articles, {mismatches} mismatching outputs")
+    print(f"  parse only: {parse_ms:8.2f} ms/article")
+    for name, total, rules in (
+        ("multi-pass", legacy_ms, legacy_rules_ms),
+        ("single-pass", ms, rules_ms),
+    ):
+        print(f"{name:>12}: {total:8.2f} ms/article, rules only {rules:8.2f} ms/article")
+    print(
+        f"speed-up: rules {legacy_rules_ms / rules_ms:.1f}x, "
+        f"clean_content {legacy_ms / ms:.1f}x"
+    )
@@ -0,0 +1,56 @@
+"""
+Benchmark the related-news encoder on CPU: sentences per second of every
+backend (torch, onnx, onnx-int8) and batch size, plus the one-off model load.
+
+Texts are article-like (title + ~200 words). A backend whose packages are
+not installed (e.g. onnxruntime / optimum for the ONNX modes) is skipped.
+
+Usage:
+    python bench_encoder.py [texts] [threads]
+"""
+
+import logging
+import os
+import sys
+import time
+
+from encoder import BACKENDS, EMBEDDING_THREADS, Encoder
+
+TEXTS = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else EMBEDDING_THREADS
+BATCH_SIZES = [16, 64, 128]
+
+
+def make_texts(count):
+    sentence = (
+        "Max Verstappen says he is not very confident of beating McLaren's Oscar "
+        "Piastri in Jeddah on Sunday after a difficult qualifying session. "
+    )
+    return [f"Race report {i}: " + sentence * (8 + i % 8) for i in range(count)]
+
+
+def run(encoder, texts):
+    encoder.encode(texts[: encoder.batch_size])  # warm-up
+    start = time.perf_counter()
+    encoder.encode(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    texts = make_texts(TEXTS)
+    print(f"{TEXTS} texts, {THREADS} threads, {os.cpu_count()} CPUs")
+
+    for backend in BACKENDS:
+        encoder = Encoder(backend=backend, threads=THREADS)
+        try:
+            start = time.perf_counter()
+            encoder.model
+            load = time.perf_counter() - start
+        except Exception as e:
+            print(f"{backend:>10}: skipped ({e})")
+            continue
+        print(f"{backend:>10}: model loaded in {load:.1f}s")
+        for batch_size in BATCH_SIZES:
+            encoder.batch_size = batch_size
+            print(f"{'':>10}  batch {batch_size:>4}: {run(encoder, texts):8.1f} sentences/s")
@@ -0,0 +1,76 @@
+"""
+Benchmark the sequential and async article download modes of `fetch_f1_news`
+against a local stub HTTP server.
+
+Usage:
+    python bench_fetch_news.py [articles] [latency_seconds]
+"""
+
+import datetime
+import logging
+import sys
+import threading
+import time
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetch_news import fetch_f1_news
+
+ARTICLES = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+
+def build_feed(base_url, count):
+    published = format_datetime(datetime.datetime.now(datetime.timezone.utc))
+    items = "".join(
+        f"<item><title>Article {i}</title><link>{base_url}/article/{i}</link>"
+        f"<pubDate>{published}</pubDate><description>Summary {i}...</description></item>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Stub</title>{items}</channel></rss>'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    feed = ""
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        if self.path == "/feed.xml":
+            body = self.feed
+            content_type = "application/rss+xml"
+        else:
+            body = (
+                '<html><body><div class="entry-content">'
+                + "<p>Paragraph with <b>bold</b> text.</p>" * 30
+                + "</div></body></html>"
+            )
+            content_type = "text/html"
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    StubHandler.feed = build_feed(base_url, ARTICLES)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    container_attrs = {"class": "entry-content"}
+    for async_mode in (False, True):
+        start = time.perf_counter()
+        news = fetch_f1_news(
+            f"{base_url}/feed.xml", 1, container_attrs, async_mode=async_mode
+        )
+        elapsed = time.perf_counter() - start
+        mode = "async" if async_mode else "sequential"
+        print(f"{mode:>10}: {len(news or [])} articles in {elapsed:.2f}s")
+
+    server.shutdown()
@@ -0,0 +1,87 @@
+"""
+Benchmark the HTML parser backends on saved article fixtures.
+
+Fixtures are read from a directory (default: raw/):
+  - *.html files are full article pages: parse + scrape + clean is timed.
+  - *.json files are the debug dumps of run_f1_news_crawler: clean is timed
+    on their "content" field.
+A synthetic page is used when no fixture is found.
+
+Usage:
+    python bench_html_parser.py [fixture_dir] [container_class]
+"""
+
+import copy
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+from fetch_news import scrape_article_content
+from html_parser import make_soup
+import html_parser
+import merge_and_clean
+
+FIXTURE_DIR = sys.argv[1] if len(sys.argv) > 1 else "raw"
+CONTAINER_ATTRS = {"class": sys.argv[2] if len(sys.argv) > 2 else "entry-content"}
+ROUNDS = 3
+
+
+def load_fixtures(fixture_dir):
+    pages, contents = [], []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            contents.extend(
+                item["content"] for item in json.load(f) or [] if item.get("content")
+            )
+    if not pages and not contents:
+        paragraph = (
+            '<p>Max Verstappen says he is <a href="#">"not very confident"</a> of beating '
+            "McLaren's <strong>Oscar Piastri</strong> in Jeddah on Sunday.</p>"
+        )
+        pages.append(
+            '<html><head><script>var a = 1;</script></head><body><div class="entry-content">'
+            + paragraph * 200
+            + '<div class="alignright"><img src="x.png"></div></div></body></html>'
+        )
+    return pages, contents
+
+
+def run(parser, pages, contents):
+    html_parser.HTML_PARSER = parser
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        items = []
+        for page in pages:
+            soup = make_soup(page)
+            items.append(
+                {"content": scrape_article_content(soup, container_attrs=CONTAINER_ATTRS)}
+            )
+        items.extend({"content": content} for content in contents)
+        merge_and_clean.clean_data(copy.deepcopy(items))
+    articles = (len(pages) + len(contents)) * ROUNDS
+    return (time.perf_counter() - start) / articles * 1000
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    pages, contents = load_fixtures(FIXTURE_DIR)
+    print(f"{len(pages)} pages, {len(contents)} contents, {ROUNDS} rounds")
+
+    parsers = ["html.parser"]
+    if html_parser.default_parser() == "lxml":
+        parsers.append("lxml")
+
+    baseline = None
+    for parser in parsers:
+        per_article = run(parser, pages, contents)
+        baseline = baseline or per_article
+        print(
+            f"{parser:>12}: {per_article:8.2f} ms/article "
+            f"({baseline - per_article:+.2f} ms saved vs html.parser)"
+        )
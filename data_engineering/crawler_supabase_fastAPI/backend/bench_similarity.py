@@ -0,0 +1,82 @@
+"""
+Benchmark the related-news top-k search on a synthetic corpus.
+
+The corpus is written to a temporary EmbeddingStore, so the blocked search
+reads it through the memory map like build_related_news does. For every
+number of new articles the blocked top-k (similarity.top_k) is timed against
+the previous approach, a full similarity row per article plus argsort (the
+N × N matrix it was taken from does not fit in memory at this size).
+
+Usage:
+    python bench_similarity.py [articles] [dim]
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from similarity import normalize, top_k
+
+ARTICLES = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+DIM = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+QUERY_COUNTS = [10, 100, 1000]
+K = 5
+
+
+def build_store(path):
+    store = EmbeddingStore(path, dim=DIM)
+    rng = np.random.default_rng(0)
+    for start in range(0, ARTICLES, 10_000):
+        count = min(10_000, ARTICLES - start)
+        store.add(
+            [f"news-{i}" for i in range(start, start + count)],
+            rng.standard_normal((count, DIM), dtype=np.float32),
+        )
+    return store
+
+
+def run_argsort(corpus, query_rows):
+    corpus = np.asarray(corpus)
+    similarities = normalize(corpus[query_rows]) @ corpus.T
+    return np.argsort(-similarities, axis=1)[:, 1 : K + 1]
+
+
+def run_top_k(corpus, query_rows):
+    return top_k(corpus[query_rows], corpus, k=K, exclude=query_rows)[0]
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        store = build_store(path)
+        print(f"{len(store)} articles × {DIM} dims stored in {time.perf_counter() - start:.1f}s")
+        corpus = store.matrix()
+        full_matrix = ARTICLES * ARTICLES * 4 / 2**30
+        print(f"full N × N similarity matrix would need {full_matrix:.1f} GiB")
+
+        rng = np.random.default_rng(1)
+        for queries in QUERY_COUNTS:
+            query_rows = rng.choice(ARTICLES, size=queries, replace=False)
+            old, old_seconds, old_peak = measure(run_argsort, corpus, query_rows)
+            new, new_seconds, new_peak = measure(run_top_k, corpus, query_rows)
+            same = np.mean([set(a) == set(b) for a, b in zip(old, new)])
+            print(
+                f"{queries:>5} new articles: argsort {old_seconds:7.2f}s "
+                f"(peak {old_peak / 2**20:7.1f} MiB) | top_k {new_seconds:7.2f}s "
+                f"(peak {new_peak / 2**20:7.1f} MiB) | "
+                f"x{old_seconds / new_seconds:.1f}, {same:.0%} identical"
+            )
@@ -0,0 +1,114 @@
+"""
+Benchmark translation throughput against a local stub model server that
+answers like the Gemini generateContent API (with occasional 429s).
+
+Usage:
+    python bench_translate.py [articles] [requests_per_minute] [latency_seconds]
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARTICLES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+REQUESTS_PER_MINUTE = sys.argv[2] if len(sys.argv) > 2 else "120"
+LATENCY = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+RATE_LIMITED_SHARE = 0.1
+# Segments the stub was asked to translate (answered requests only)
+segments_sent = 0
+segments_lock = threading.Lock()
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    # Keep-alive like the real endpoint, so connection reuse is measured too
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(LATENCY)
+        if random.random() < RATE_LIMITED_SHARE:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if "generationConfig" in body:
+            prompt = body["contents"][0]["parts"][0]["text"]
+            request = json.loads(prompt.rsplit("\n\n", 1)[1])
+            global segments_sent
+            with segments_lock:
+                segments_sent += len(request["segments"])
+            fields = {
+                "segments_zh": [f"譯 {segment}" for segment in request["segments"]],
+                "keep": [True] * len(request["segments"]),
+            }
+            if "title" in request:
+                fields["title_zh"] = "標題"
+            text = json.dumps(fields, ensure_ascii=False)
+        else:
+            text = "Result: 翻譯結果"
+        payload = json.dumps(
+            {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubModelHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Must be set before translate_news is imported
+    os.environ["GEMINI_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}/"
+    os.environ["REQUESTS_PER_MINUTE"] = REQUESTS_PER_MINUTE
+    import translate_news
+    from llm_client import get_llm_client
+    from translation_cache import TranslationCache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for workers in (1, 4):
+        articles = [
+            {
+                "title": f"Title {i}",
+                "content": f"<p>Content {i}</p><p>Become a RaceFans supporter</p>",
+                "link": str(i),
+            }
+            for i in range(ARTICLES)
+        ]
+        # 每一輪使用新的記憶體快取，兩輪的結果才可以比較
+        cache = TranslationCache(None)
+        mark = get_llm_client().mark()
+        sent_before = segments_sent
+        start = time.perf_counter()
+        result = translate_news.fetch_and_translate_column(
+            articles, output_dir=None, debug=True, workers=workers, cache=cache
+        )
+        elapsed = time.perf_counter() - start
+        translated = sum(
+            1 for item in result if item["translation_status"] == "translated"
+        )
+        print(
+            f"workers={workers}: {translated}/{ARTICLES} translated in {elapsed:.1f}s "
+            f"({ARTICLES / elapsed * 60:.1f} articles/min), "
+            f"cache hit rate {cache.stats()['hit_rate']:.0%}, "
+            f"{segments_sent - sent_before} segments sent to the model"
+        )
+        stats = get_llm_client().stats(mark)
+        print(
+            f"  {stats['calls']} calls, {stats['errors']} errors, "
+            f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s"
+        )
+
+    server.shutdown()
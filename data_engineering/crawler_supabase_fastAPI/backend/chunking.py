@@ -0,0 +1,66 @@
+import os
+import re
+from html_parser import split_blocks
+
+# Token budget of the content sent in one model request
+MAX_CHUNK_TOKENS = int(os.getenv("MAX_CHUNK_TOKENS", "2000"))
+# Chunks of one article processed at the same time
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "4"))
+# Rough characters per token of English text and markup
+CHARS_PER_TOKEN = 4
+
+# CJK characters are roughly one token each
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate that works for both the English source and the
+    translated Chinese content, without loading a tokenizer.
+    """
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk) // CHARS_PER_TOKEN + 1
+
+
+def chunk_segments(segments, max_tokens=MAX_CHUNK_TOKENS):
+    """
+    Greedily group consecutive segments into chunks of at most `max_tokens`.
+    A segment larger than the budget gets a chunk of its own.
+
+    Args:
+        segments (list): HTML segments, see html_parser.split_blocks.
+        max_tokens (int): Token budget per chunk.
+
+    Returns:
+        list: Lists of segments, in order.
+    """
+    chunks = []
+    chunk = []
+    size = 0
+    for segment in segments:
+        tokens = estimate_tokens(segment)
+        if chunk and size + tokens > max_tokens:
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+        chunk.append(segment)
+        size += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def chunk_html(html, max_tokens=MAX_CHUNK_TOKENS):
+    """
+    Split HTML content on block boundaries into pieces that fit the token
+    budget. Joining the pieces gives the same blocks in the same order, but
+    not the exact markup: the whitespace between blocks is dropped and every
+    block is re-serialised by the parser. Content within the budget is
+    returned unchanged as a single piece.
+
+    Returns:
+        list: HTML string of every chunk, in order.
+    """
+    if estimate_tokens(html) <= max_tokens:
+        return [html]
+    return ["".join(chunk) for chunk in chunk_segments(split_blocks(html), max_tokens)]
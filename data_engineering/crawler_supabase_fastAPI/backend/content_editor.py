@@ -1,61 +1,109 @@
-import requests
 import os
 import json
 from dotenv import load_dotenv
-import time
 import logging
-import random
-from supabase import create_client, Client
-from requests.exceptions import Timeout
 import datetime
-from upload_to_supabase import upload_to_supabase
+from concurrent.futures import ThreadPoolExecutor
+from chunking import CHUNK_WORKERS, chunk_html
+from llm_client import get_llm_client
+from upload_to_supabase import SupabaseWriter
+from supabase_client import get_supabase
 
 load_dotenv()
 
-# Init Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-REQUESTS_PER_MINUTE = 5
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Columns a content edit worker needs
+CONTENT_COLUMNS = "id,link, title_zh, content_zh, translation_status"
 
 logging.basicConfig(level=logging.INFO)
 
+CONTENT_PROMPT = (
+    "你是一位經驗豐富的 F1 賽車新聞編輯，擅長將中文新聞內容整理為條理清楚、精簡但保留重點的中文。請幫我處理以下 HTML 格式的文章內容：\n\n"
+    "只要段落之間語意通順，就保留該段內容\n\n"
+    "保留有意義的段落、評論、車手發言、賽事重點等資訊\n\n"
+    "移除所有重複內容、廣告、影片嵌入、無意義的 <script>、社群分享連結、類似「透過每日電子郵件獲取我們所有最新的報導 - 沒有其他內容。沒有行銷，沒有廣告。在此註冊」、生日祝賀與歷史花絮等無關段落\n\n"
+    "保留 HTML 的結構標籤，如 <p>、<h3>、<blockquote>、<a>、<table>、<td>、<rd> 等，不要轉為純文字\n\n"
+    "若以下內容沒有任何值得保留的部分，請僅回傳 Result：Skilled\n\n"
+    "Strictly follow the output format below:\n\n"
+    "Result: <整理好的內容>\n\n"
+    "Now, here is the content:\n\n{text}"
+)
+
+
+def edit_content_row(row):
+    """
+    Edit the translated content of one row. Long content is split into
+    chunks that are edited concurrently and joined back in order.
+
+    Returns:
+        dict: The row to upsert, None when the row has no content or processing raised.
+    """
+    id = row.get("id")
+    title_zh = row.get("title_zh")
+    content_zh = row.get("content_zh")
+
+    logging.info(
+        "---------------------------------------------------------------------------------------"
+    )
+    logging.info(f"{title_zh} Translation completed")
+    logging.info(
+        "---------------------------------------------------------------------------------------"
+    )
 
-def edit_text(combined_text, prompt_template):
-    prompt = prompt_template.format(text=combined_text)
     try:
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}",
-            headers={"Content-Type": "application/json"},
-            json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
-            timeout=120,
-        )
-        if response.status_code == 200:
-            response_data = response.json()
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                return response_data["candidates"][0]["content"]["parts"][0]["text"]
-            else:
-                logging.error(
-                    f"Unexpected response format: {response_data}", exc_info=True
+        if not content_zh:
+            logging.warning(f"Row {id} has no content_zh to edit.")
+            return None
+
+        llm = get_llm_client()
+        # 長文章依 token 預算切成多個 chunk 同時編輯，再依原順序組回
+        # 速率限制、重試與 timeout 都由共用的 LLM client 處理
+        chunks = chunk_html(content_zh)
+        with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_WORKERS, len(chunks)))) as executor:
+            edited_chunks = list(
+                executor.map(
+                    lambda chunk: llm.complete(CONTENT_PROMPT.format(text=chunk)), chunks
                 )
-                return None
-        else:
-            logging.error(
-                f"Translation failed with status code {response.status_code}: {response.text}",
-                exc_info=True,
             )
-            return None
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request failed with error: {e}", exc_info=True)
+
+        kept_chunks = []
+        edited_any = False
+        for chunk, edited in zip(chunks, edited_chunks):
+            if edited is None:
+                kept_chunks.append(chunk)  # timeout 或失敗的 chunk 保留原文
+            elif "Skilled" in edited:
+                edited_any = True  # 該 chunk 沒有值得保留的內容
+            else:
+                kept_chunks.append(edited)
+                edited_any = True
+
+        if not edited_any:
+            edited_content = content_zh
+            status = "didNothing"  # 表示沒改動（包含 timeout 三次）
+        elif not kept_chunks:
+            edited_content = content_zh
+            status = "skilled"  # 表示該篇沒有值得保留的內容
+        else:
+            edited_content = "".join(kept_chunks)
+            status = "edited"  # 表示成功編輯過
+
+        return {
+            "id": id,
+            "content_zh": edited_content,
+            "content_status": status,
+            "link": row.get("link"),
+        }
+
+    except Exception as e:
+        logging.error(f"Error processing row {id}: {e}", exc_info=True)
         return None
 
 
 def content_edit(output_dir, debug=False):
     try:
         response = (
-            supabase.table("f1_news")
-            .select("id,link, title_zh, content_zh, translation_status")
+            get_supabase()
+            .table("f1_news")
+            .select(CONTENT_COLUMNS)
             .eq("translation_status", "translated")
             .is_("content_status", "NULL")
             .execute()
@@ -63,94 +111,26 @@ def content_edit(output_dir, debug=False):
         data = response.data
 
         result = []
-
-        def try_edit(text, translation_prompt, retries=3):
-            for attempt in range(1, retries + 1):
-                try:
-                    edited = edit_text(text, translation_prompt)
-                    if edited and "Result:" in edited:
-                        return edited.split("Result:", 1)[1].strip()
-                    logging.warning(
-                        f"Translation attempt {attempt} failed. Retrying..."
-                    )
-                except Timeout:
-                    if attempt == retries:
-                        logging.warning(
-                            f"Translation timeout on attempt {attempt}. Skipping for now."
-                        )
-                        return "TIMEOUT_ERROR"  # 新增特殊返回值標記timeout失敗
-                    else:
-                        logging.warning(
-                            f"Translation timeout on attempt {attempt}. Retrying..."
-                        )
-                except Exception as e:
-                    logging.warning(f"Unexpected error on attempt {attempt}: {e}")
-                time.sleep(random.uniform(3, 5))
-            return None
-
-        prompt = (
-            "你是一位經驗豐富的 F1 賽車新聞編輯，擅長將中文新聞內容整理為條理清楚、精簡但保留重點的中文。請幫我處理以下 HTML 格式的文章內容：\n\n"
-            "只要段落之間語意通順，就保留該段內容\n\n"
-            "保留有意義的段落、評論、車手發言、賽事重點等資訊\n\n"
-            "移除所有重複內容、廣告、影片嵌入、無意義的 <script>、社群分享連結、類似「透過每日電子郵件獲取我們所有最新的報導 - 沒有其他內容。沒有行銷，沒有廣告。在此註冊」、生日祝賀與歷史花絮等無關段落\n\n"
-            "保留 HTML 的結構標籤，如 <p>、<h3>、<blockquote>、<a>、<table>、<td>、<rd> 等，不要轉為純文字\n\n"
-            "若整篇文章沒有任何值得保留的內容，請僅回傳 Result：Skilled\n\n"
-            "Strictly follow the output format below:\n\n"
-            "Result: <整理好的內容>\n\n"
-            "Now, here is the content:\n\n{text}"
-        )
-
-        for i, row in enumerate(data):
-
-            id = row.get("id")
-            title_zh = row.get("title_zh")
-            content_zh = row.get("content_zh")
-
-            logging.info(
-                "---------------------------------------------------------------------------------------"
-            )
-            logging.info(f"{title_zh} Translation completed")
+        # 結果會累積後批次 upsert，而不是每篇文章一個請求
+        writer = None if debug else SupabaseWriter("f1_news", updated=True)
+
+        llm = get_llm_client()
+        llm_mark = llm.mark()
+
+        for row in data:
+            item = edit_content_row(row)
+            if item:
+                result.append(item)
+                if writer:
+                    writer.add(item)
+
+        llm.log_stats("Content edit", since=llm_mark)
+        if writer:
+            upload_results = writer.close()
             logging.info(
-                "---------------------------------------------------------------------------------------"
+                f"Uploaded {len(upload_results['data'])} rows, {len(upload_results['failed'])} failed."
             )
 
-            try:
-                if content_zh:
-                    edited_content = try_edit(content_zh, prompt)
-                    if edited_content == "TIMEOUT_ERROR":  # 檢查是否為timeout三次
-                        edited_content = row.get("content_zh")
-                        status = "didNothing"  # timeout三次後將status設為didNothing
-                    elif edited_content is None:
-                        edited_content = row.get("content_zh")
-                        status = "didNothing"  # 表示沒改動
-                    elif "Skilled" in edited_content:
-                        edited_content = row.get("content_zh")
-                        status = "skilled"  # 表示該篇沒有值得保留的內容
-                    else:
-                        status = "edited"  # 表示成功編輯過
-
-                result.append(
-                    {
-                        "id": id,
-                        "content_zh": edited_content,
-                        "content_status": status,
-                        "link": row.get("link"),
-                    }
-                )
-                if not debug:
-                    logging.info(f"Uploading to Supabase: {id}")
-                    upload_to_supabase(
-                        "f1_news",
-                        [result[-1]],
-                        created=False,
-                        updated=True,
-                    )
-
-            except Exception as e:
-                logging.error(f"Error processing row {id}: {e}", exc_info=True)
-
-            time.sleep(random.uniform(10, 20))
-
         if debug:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = os.path.join(output_dir, f"edited_result_{timestamp}.json")
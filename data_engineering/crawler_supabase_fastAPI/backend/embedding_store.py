@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import numpy as np
+
+# Directory holding the embedding matrix and its id index between runs
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", "data/embeddings")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+
+
+class EmbeddingStore:
+    """
+    Append-only store of article embeddings: a float32 matrix on disk
+    (`vectors.f32`, one row per article) read through a memory map, plus the
+    article id of every row (`ids.txt`, one per line). Only articles that are
+    not in the store yet need to be encoded, so a run costs the new articles,
+    not the whole corpus.
+
+    Vectors are stored L2-normalised, so a dot product is the cosine similarity.
+
+    Args:
+        path (str): Store directory, created when missing.
+        model (str): Name of the model the vectors come from.
+        dim (int): Embedding dimension.
+        backend (str): Inference backend of the encoder (see encoder.BACKENDS);
+            quantised vectors are not mixed with full-precision ones.
+        text_version (int, optional): Version of the text that is embedded per
+            article; bump it when that text changes so old vectors are not mixed in.
+        A store built with another model, dimension, backend or text version is
+        discarded.
+    """
+
+    def __init__(
+        self,
+        path=EMBEDDING_STORE_PATH,
+        model=EMBEDDING_MODEL,
+        dim=EMBEDDING_DIM,
+        backend="torch",
+        text_version=None,
+    ):
+        self.path = path
+        self.model = model
+        self.dim = dim
+        self.backend = backend
+        self.text_version = text_version
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.ids_path = os.path.join(path, "ids.txt")
+        self.meta_path = os.path.join(path, "meta.json")
+        self.ids = []
+        self.index = {}
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        meta = None
+        if os.path.exists(self.meta_path):
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not read {self.meta_path}: {e}")
+        if meta != self.meta:
+            if meta is not None:
+                logging.warning(f"Embedding store {self.path} was built with {meta}, rebuilding.")
+            self._reset()
+            return
+
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                self.ids = [line.rstrip("\n") for line in f if line.strip()]
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        rows = size // self.row_bytes
+        if size != len(self.ids) * self.row_bytes:
+            # 上次寫入中斷：只保留兩個檔案都完整的列
+            n = min(rows, len(self.ids))
+            logging.warning(f"Embedding store {self.path} is inconsistent, keeping {n} rows.")
+            self.ids = self.ids[:n]
+            self._rewrite_ids()
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(n * self.row_bytes)
+        self.index = {id: row for row, id in enumerate(self.ids)}
+
+    def _reset(self):
+        self.ids = []
+        self.index = {}
+        open(self.vectors_path, "wb").close()
+        open(self.ids_path, "w").close()
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    def _rewrite_ids(self):
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{id}\n" for id in self.ids)
+
+    @property
+    def meta(self):
+        """
+        Identity of the vectors, kept in meta.json.
+        """
+        return {
+            "model": self.model,
+            "dim": self.dim,
+            "backend": self.backend,
+            "text_version": self.text_version,
+        }
+
+    @property
+    def row_bytes(self):
+        return self.dim * np.dtype(np.float32).itemsize
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return id in self.index
+
+    def missing(self, ids):
+        """
+        Ids that have no embedding yet, in the given order.
+        """
+        return [id for id in ids if id not in self.index]
+
+    def add(self, ids, vectors):
+        """
+        Append the embeddings of new articles. Ids already in the store are skipped.
+
+        Args:
+            ids (list): Article ids.
+            vectors (array-like): Matrix of shape (len(ids), dim).
+
+        Returns:
+            int: Number of rows appended.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        keep = []
+        seen = set()
+        for row, id in enumerate(map(str, ids)):
+            if id not in self.index and id not in seen:
+                keep.append(row)
+                seen.add(id)
+        if not keep:
+            return 0
+        vectors = vectors[keep]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        new_ids = [str(ids[row]) for row in keep]
+
+        # 先寫向量再寫 id，中斷時 _load 會截掉沒有 id 的列
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+        with open(self.ids_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{id}\n" for id in new_ids)
+        for id in new_ids:
+            self.index[id] = len(self.ids)
+            self.ids.append(id)
+        return len(new_ids)
+
+    def matrix(self):
+        """
+        Read-only memory map of all embeddings, shape (len(self), dim).
+        Pages are only loaded when rows are used.
+        """
+        if not self.ids:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dim)
+        )
+
+    def rows(self, ids):
+        """
+        Matrix row of every id (ids must be in the store).
+        """
+        return np.fromiter((self.index[str(id)] for id in ids), dtype=np.int64, count=len(ids))
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+from embedding_store import EMBEDDING_MODEL
+
+# Sentences encoded per forward pass
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Intra-op threads of the CPU inference (torch / onnxruntime)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(os.cpu_count() or 1)))
+# torch | onnx | onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Quantised ONNX file of the model repository used by onnx-int8
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+# Downloaded models are kept here, so a run does not fetch them again
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "data/models")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_encoder = None
+_lock = threading.Lock()
+
+
+class Encoder:
+    """
+    Sentence embedding model for CPU-only hosts. The model is loaded once, on
+    first use, from the on-disk cache and reused for every batch, so a
+    long-lived worker (`python related_news.py --watch`) pays the load only once.
+
+    Args:
+        model (str): sentence-transformers model name.
+        backend (str): "torch", "onnx" (onnxruntime) or "onnx-int8" (onnxruntime
+            with the quantised weights of the model repository).
+        batch_size (int): Sentences per forward pass.
+        threads (int): Intra-op threads.
+        cache_dir (str): Model download cache.
+    """
+
+    def __init__(
+        self,
+        model=EMBEDDING_MODEL,
+        backend=EMBEDDING_BACKEND,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        threads=EMBEDDING_THREADS,
+        cache_dir=EMBEDDING_CACHE_DIR,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+        self.model_name = model
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = max(1, threads)
+        self.cache_dir = cache_dir
+        self.sentences = 0
+        self.seconds = 0.0
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def _load(self):
+        # sentence_transformers 載入很慢，只在真正需要編碼時才 import
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(self.threads)
+        start = time.perf_counter()
+        kwargs = {"device": "cpu", "cache_folder": self.cache_dir}
+        if self.backend != "torch":
+            model_kwargs = {"provider": "CPUExecutionProvider"}
+            try:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = self.threads
+                model_kwargs["session_options"] = options
+            except ImportError:
+                pass
+            if self.backend == "onnx-int8":
+                model_kwargs["file_name"] = EMBEDDING_ONNX_INT8_FILE
+            kwargs.update(backend="onnx", model_kwargs=model_kwargs)
+        model = SentenceTransformer(self.model_name, **kwargs)
+        logging.info(
+            f"Loaded {self.model_name} ({self.backend}, {self.threads} threads) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return model
+
+    def encode(self, texts):
+        """
+        Args:
+            texts (list): Sentences / article texts.
+
+        Returns:
+            np.ndarray: L2-normalised float32 embeddings, shape (len(texts), dim).
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        model = self.model
+        start = time.perf_counter()
+        vectors = model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        self.seconds += time.perf_counter() - start
+        self.sentences += len(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Sentences encoded, seconds spent and sentences per second.
+        """
+        return {
+            "sentences": self.sentences,
+            "seconds": self.seconds,
+            "per_second": self.sentences / self.seconds if self.seconds else 0.0,
+        }
+
+
+def get_encoder():
+    """
+    Return the shared encoder, created on first use.
+    """
+    global _encoder
+    if _encoder is None:
+        with _lock:
+            if _encoder is None:
+                _encoder = Encoder()
+    return _encoder
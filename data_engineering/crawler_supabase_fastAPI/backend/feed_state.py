@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+
+# File that keeps the ETag / Last-Modified of every feed between runs
+FEED_STATE_PATH = os.getenv("FEED_STATE_PATH", "data/feed_state.json")
+
+
+class FeedStateStore:
+    """
+    Persistent ETag / Last-Modified store used to send conditional requests
+    for RSS feeds. A feed that answers 304 Not Modified is skipped entirely.
+    """
+
+    def __init__(self, path=FEED_STATE_PATH):
+        self.path = path
+        self.state = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not read feed state from {path}: {e}")
+
+    def get(self, url):
+        """
+        Returns:
+            dict: {'etag': ..., 'modified': ...} of the feed, empty if unknown.
+        """
+        return self.state.get(url, {})
+
+    def conditional_headers(self, url):
+        """
+        Build the If-None-Match / If-Modified-Since headers for a feed.
+        """
+        feed_state = self.get(url)
+        headers = {}
+        if feed_state.get("etag"):
+            headers["If-None-Match"] = feed_state["etag"]
+        if feed_state.get("modified"):
+            headers["If-Modified-Since"] = feed_state["modified"]
+        return headers
+
+    def update(self, url, etag=None, modified=None):
+        """
+        Remember the validators of a feed. Call only after the feed has been
+        processed successfully, otherwise its entries would be skipped next run.
+        """
+        if etag or modified:
+            self.state[url] = {"etag": etag, "modified": modified}
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+        logging.info(f"Feed state saved to {self.path}")
@@ -0,0 +1,41 @@
+# RSS feeds crawled by main.py.
+# url: RSS feed URL
+# container_attrs: attributes of the article content container
+# source: news source name saved with every article
+FEEDS = [
+    {
+        "url": "https://www.autosport.com/rss/feed/f1",
+        "container_attrs": {"class": "ms-article-content"},
+        "source": "Autosport",
+    },
+    {
+        "url": "https://feeds.bbci.co.uk/sport/formula1/rss.xml",
+        "container_attrs": {"data-component": "text-block"},
+        "source": "BBC",
+    },
+    {
+        "url": "https://www.motorsport.com/rss/f1/news/",
+        "container_attrs": {"class": "ms-article-content"},
+        "source": "Motorsport",
+    },
+    {
+        "url": "https://www.racefans.net/feed/",
+        "container_attrs": {"class": "entry-content"},
+        "source": "RaceFans",
+    },
+    {
+        "url": "https://www.pitpass.com/fes_php/fes_usr_sit_newsfeed.php",
+        "container_attrs": {"class": "KonaBody"},
+        "source": "Pitpass",
+    },
+    {
+        "url": "https://www.f1technical.net/rss/news.xml",
+        "container_attrs": {"class": "content article"},
+        "source": "F1 Technical News",
+    },
+    {
+        "url": "https://www.f1technical.net/rss/articles.xml",
+        "container_attrs": {"class": "content article"},
+        "source": "F1 Technical Articles",
+    },
+]
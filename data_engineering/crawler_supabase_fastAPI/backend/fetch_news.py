@@ -1,16 +1,114 @@
+import asyncio
 import feedparser
+import httpx
 import requests
-from bs4 import BeautifulSoup
+from bs4 import Tag
 import datetime
 from dateutil import parser
 import json
 import os
+import queue
 import re
+import threading
+import time
+from urllib.parse import urlparse
 from pytz import timezone
 import logging
+from html_parser import make_soup, parse_fragment
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+# Maximum number of in-flight article requests per host in async mode
+PER_HOST_LIMIT = 4
+REQUEST_TIMEOUT = 30
+# Seconds allowed for one feed (RSS + all its articles) in crawl_feeds
+FEED_TIMEOUT = 180
+# Parsed articles waiting for the consumer in iter_feeds
+MAX_PENDING_ARTICLES = 50
 
-def fetch_f1_news(rss_url, days=3, container_attrs=None):
+
+def recent_entries(feed, days, seen=None):
+    """
+    Select the feed entries published within the past `days` days.
+
+    Args:
+        feed: Parsed feedparser result.
+        days (int): The number of days to fetch news for.
+        seen (SeenLinkIndex, optional): Links already ingested; these entries are skipped.
+
+    Returns:
+        list: (entry, published_at) tuples in feed order.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    n_days_ago = now - datetime.timedelta(days)
+    entries = []
+    skipped = 0
+    for entry in feed.entries:
+        published_at = parser.parse(entry.published)
+        if n_days_ago <= published_at <= now:
+            if seen is not None and entry.link in seen:
+                skipped += 1
+                continue
+            entries.append((entry, published_at))
+    if skipped:
+        logging.info(f"Skipped {skipped} already ingested articles.")
+    return entries
+
+
+def build_news_item(entry, published_at, html, container_attrs=None):
+    """
+    Parse a downloaded article page into a news item.
+
+    Args:
+        entry: RSS feed entry object.
+        published_at (datetime): Parsed publish time of the entry.
+        html (str): Raw HTML of the article page.
+        container_attrs (dict): Attributes to find the content container in the article.
+
+    Returns:
+        dict: News item containing 'title', 'link', 'published_at', 'summary',
+              'author', 'content' and 'image_url'.
+    """
+    # The page is parsed once and shared by author and content extraction
+    soup = make_soup(html)
+    article_author = author(entry, soup)
+    article_content = scrape_article_content(soup, container_attrs=container_attrs)
+
+    # Modify the summary to remove content after "..."
+    modified_summary = (
+        entry.summary.split("...")[0] + "..."
+        if "..." in entry.summary
+        else entry.summary
+    )
+
+    # Extract image URL from RSS entry
+    image_url = extract_image_url(entry)
+
+    # If no image in RSS, try to get the first image from the article
+    # if not image_url:
+    #     image_url = extract_first_image_from_article(soup)
+
+    return {
+        "title": entry.title,
+        "link": entry.link,
+        "published_at": published_at.strftime("%Y-%m-%d_%H:%M:%S"),
+        "summary": modified_summary,
+        "author": article_author,
+        "content": article_content,
+        "image_url": image_url,
+    }
+
+
+def fetch_f1_news(
+    rss_url,
+    days=3,
+    container_attrs=None,
+    async_mode=False,
+    state=None,
+    seen=None,
+    validators=None,
+):
     """
     Fetch the F1 news RSS feed and parse news data from the past three days, including the content and image URLs.
 
@@ -18,63 +116,275 @@ def fetch_f1_news(rss_url, days=3, container_attrs=None):
         rss_url (str): The URL of the F1 news RSS feed.
         days (int): The number of days to fetch news for.
         container_attrs (dict): Attributes to find the content container in the article.
+        async_mode (bool): Download the articles concurrently with `fetch_f1_news_async`.
+        state (FeedStateStore, optional): ETag / Last-Modified store. When given, the
+            feed is requested conditionally and skipped if it has not changed.
+        seen (SeenLinkIndex, optional): Links already ingested; they are not downloaded again.
+        validators (dict, optional): Filled with the feed's 'etag' / 'modified' when
+            the feed was fetched successfully. The state is not updated here: pass
+            them to `state.update` once the items have been uploaded.
 
     Returns:
         list: A list of news from the past specified days, where each news item is a dictionary
               containing 'title', 'link', 'published_at', 'summary', 'content', and 'image_url'.
               Returns None if an error occurs.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    now = datetime.datetime.now(datetime.timezone.utc)
-    n_days_ago = now - datetime.timedelta(days)
-    feed = feedparser.parse(rss_url)
+    if async_mode:
+        return asyncio.run(
+            fetch_f1_news_async(
+                rss_url,
+                days,
+                container_attrs=container_attrs,
+                state=state,
+                seen=seen,
+                validators=validators,
+            )
+        )
+
+    feed_state = state.get(rss_url) if state else {}
+    feed = feedparser.parse(
+        rss_url, etag=feed_state.get("etag"), modified=feed_state.get("modified")
+    )
+    if feed.get("status") == 304:
+        logging.info(f"Feed not modified since last run, skipping: {rss_url}")
+        return []
     news_items = []
 
     try:
-        for entry in feed.entries:
-            published_at = parser.parse(entry.published)
-            if n_days_ago <= published_at <= now:
-                article_url = entry.link
-                logging.info(
-                    f"Fetching article content: published at {published_at}, {article_url}"
-                )
-                response = requests.get(article_url, headers=headers)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                article_author = author(entry, soup)
-                article_content = scrape_article_content(
-                    soup, container_attrs=container_attrs
-                )
+        for entry, published_at in recent_entries(feed, days, seen):
+            article_url = entry.link
+            logging.info(
+                f"Fetching article content: published at {published_at}, {article_url}"
+            )
+            response = requests.get(article_url, headers=HEADERS)
+            response.raise_for_status()
+            news_items.append(
+                build_news_item(entry, published_at, response.text, container_attrs)
+            )
+        if validators is not None:
+            validators.update(etag=feed.get("etag"), modified=feed.get("modified"))
+        return news_items
+    except requests.exceptions.RequestException as e:
+        logging.error(
+            f"An error occurred while fetching the article: {e}", exc_info=True
+        )
+        return None
+    except Exception as e:
+        logging.error(
+            f"An unexpected error occurred while fetching news: {e}", exc_info=True
+        )
+        return None
 
-                # Modify the summary to remove content after "..."
-                modified_summary = (
-                    entry.summary.split("...")[0] + "..."
-                    if "..." in entry.summary
-                    else entry.summary
-                )
 
-                # Extract image URL from RSS entry
-                image_url = extract_image_url(entry)
-
-                # If no image in RSS, try to get the first image from the article
-                # if not image_url:
-                #     image_url = extract_first_image_from_article(soup)
-
-                news_items.append(
-                    {
-                        "title": entry.title,
-                        "link": entry.link,
-                        "published_at": published_at.strftime("%Y-%m-%d_%H:%M:%S"),
-                        "summary": modified_summary,
-                        "author": article_author,
-                        "content": article_content,
-                        "image_url": image_url,
-                    }
+class HostLimiter:
+    """
+    Bound the number of concurrent requests sent to each host.
+    Must be created inside the running event loop.
+    """
+
+    def __init__(self, per_host_limit=PER_HOST_LIMIT):
+        self.per_host_limit = per_host_limit
+        self._semaphores = {}
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._semaphores[host]
+
+
+class FeedClock:
+    """
+    Time budget of one feed that only runs while at least one of its network
+    requests (RSS or article) is in flight. Time spent on the consumer
+    (`on_article`, clean / upload) or waiting for a `max_pending` slot is not
+    counted, so a slow upload cannot make a healthy feed time out.
+    Must be created inside the running event loop.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._loop = asyncio.get_running_loop()
+        self._used = 0.0
+        self._active = 0
+        self._active_since = None
+
+    async def measure(self, awaitable):
+        """
+        Await a network request, counting its duration against the budget.
+        Overlapping requests are counted once.
+        """
+        if self._active == 0:
+            self._active_since = self._loop.time()
+        self._active += 1
+        try:
+            return await awaitable
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._used += self._loop.time() - self._active_since
+
+    def remaining(self):
+        """
+        Seconds of network time left, None without a timeout.
+        """
+        if self.timeout is None:
+            return None
+        used = self._used
+        if self._active:
+            used += self._loop.time() - self._active_since
+        return self.timeout - used
+
+    async def run(self, coro):
+        """
+        Await `coro`, cancelling it once the budget is used up.
+
+        Raises:
+            asyncio.TimeoutError: When the feed used more network time than `timeout`.
+        """
+        task = asyncio.ensure_future(coro)
+        try:
+            while True:
+                remaining = self.remaining()
+                if remaining is not None and remaining <= 0:
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+                    raise asyncio.TimeoutError()
+                # 沒有請求進行中時預算不會減少，等待會重複直到真的用完
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    return task.result()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+
+def create_async_client():
+    """
+    Create the shared HTTP client used for async crawling.
+    """
+    return httpx.AsyncClient(
+        headers=HEADERS, timeout=REQUEST_TIMEOUT, follow_redirects=True
+    )
+
+
+async def fetch_url(client, limiter, url, headers=None):
+    """
+    GET a URL through the shared client, respecting the per-host limit.
+    A 304 Not Modified response is returned as is.
+    """
+    async with limiter.for_url(url):
+        response = await client.get(url, headers=headers)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+async def fetch_f1_news_async(
+    rss_url,
+    days=3,
+    container_attrs=None,
+    client=None,
+    limiter=None,
+    state=None,
+    seen=None,
+    on_article=None,
+    validators=None,
+    pending=None,
+    clock=None,
+):
+    """
+    Async version of `fetch_f1_news`. All articles of the feed are downloaded
+    concurrently, so the crawl takes about as long as the slowest host instead
+    of the sum of every round trip.
+
+    Args:
+        rss_url (str): The URL of the F1 news RSS feed.
+        days (int): The number of days to fetch news for.
+        container_attrs (dict): Attributes to find the content container in the article.
+        client (httpx.AsyncClient, optional): Shared HTTP client. A private one is
+            created (and closed) when omitted.
+        limiter (HostLimiter, optional): Shared per-host concurrency limiter.
+        state (FeedStateStore, optional): ETag / Last-Modified store for conditional requests.
+        seen (SeenLinkIndex, optional): Links already ingested; they are not downloaded again.
+        on_article (coroutine function, optional): Streaming mode. Every news item is
+            awaited through this callback as soon as it is parsed instead of being
+            collected, and an empty list is returned.
+        pending (asyncio.Semaphore, optional): Streaming mode. Acquired before an
+            article is downloaded and released once `on_article` has taken it, so
+            at most that many articles are in flight between the network and the
+            consumer.
+        clock (FeedClock, optional): Measures the network requests, so the feed
+            timeout only covers them and not `on_article`.
+        validators (dict, optional): Filled with the feed's 'etag' / 'modified' when
+            every article was fetched, see `fetch_f1_news`.
+
+    Returns:
+        list: News items in feed order, or None if an error occurs.
+    """
+    own_client = client is None
+    if own_client:
+        client = create_async_client()
+    if limiter is None:
+        limiter = HostLimiter()
+
+    def fetch(url, headers=None):
+        # 只有網路請求的時間算在 feed timeout 內
+        request = fetch_url(client, limiter, url, headers=headers)
+        return clock.measure(request) if clock else request
+
+    try:
+        feed_response = await fetch(
+            rss_url, headers=state.conditional_headers(rss_url) if state else None
+        )
+        if feed_response.status_code == 304:
+            logging.info(f"Feed not modified since last run, skipping: {rss_url}")
+            return []
+        feed = feedparser.parse(feed_response.content)
+        entries = recent_entries(feed, days, seen)
+        for entry, published_at in entries:
+            logging.info(
+                f"Fetching article content: published at {published_at}, {entry.link}"
+            )
+
+        async def fetch_article(entry, published_at):
+            if on_article is None:
+                response = await fetch(entry.link)
+                return build_news_item(
+                    entry, published_at, response.text, container_attrs
                 )
+            # 下載前先取得名額，交給 consumer 後才釋放，下載速度跟著 consumer 走
+            if pending is not None:
+                await pending.acquire()
+            try:
+                response = await fetch(entry.link)
+                item = build_news_item(entry, published_at, response.text, container_attrs)
+                await on_article(item)
+            finally:
+                if pending is not None:
+                    pending.release()
+            return None
+
+        # gather keeps the results in feed order
+        results = await asyncio.gather(
+            *(fetch_article(entry, published_at) for entry, published_at in entries),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        news_items = [item for item in results if item is not None]
+        if validators is not None:
+            validators.update(
+                etag=feed_response.headers.get("ETag"),
+                modified=feed_response.headers.get("Last-Modified"),
+            )
         return news_items
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logging.error(
             f"An error occurred while fetching the article: {e}", exc_info=True
         )
@@ -84,6 +394,9 @@ def fetch_f1_news(rss_url, days=3, container_attrs=None):
             f"An unexpected error occurred while fetching news: {e}", exc_info=True
         )
         return None
+    finally:
+        if own_client:
+            await client.aclose()
 
 
 def extract_image_url(entry):
@@ -174,14 +487,16 @@ def clean_bbc_intro_paragraphs(html_content):
     These typically appear at the start and contain lots of <b> tags.
 
     Args:
-        html_content (str): Raw HTML content of the article.
+        html_content (str or Tag): Raw HTML content of the article, or an
+            already parsed tree, which is used as is.
 
     Returns:
         str: Cleaned HTML content.
     """
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html_content, "html.parser")
+    if isinstance(html_content, Tag):
+        soup = html_content
+    else:
+        soup = parse_fragment(html_content)
     cleaned_paragraphs = []
 
     for p in soup.find_all("p"):
@@ -221,6 +536,8 @@ def scrape_article_content(soup, container_attrs=None, paragraph_tag="p", source
         containers = soup.find_all(attrs=container_attrs)
     else:
         containers = [soup]  # No container specified, use entire soup
+    # Parsed trees the content came from, reused for the BBC clean-up
+    content_roots = containers
 
     for container in containers:
         # Recursively find all relevant tags inside the container
@@ -243,6 +560,7 @@ def scrape_article_content(soup, container_attrs=None, paragraph_tag="p", source
 
     # Fallback: if nothing was found, try searching full soup
     if not article_content:
+        content_roots = [soup]
         paragraphs_headers_tables = soup.find_all(
             lambda tag: (
                 tag.name in [paragraph_tag, "h3", "table"]
@@ -263,7 +581,12 @@ def scrape_article_content(soup, container_attrs=None, paragraph_tag="p", source
         article_content = "\n".join(str(p) for p in paragraphs).strip()
 
     if source == "BBC":
-        article_content = clean_bbc_intro_paragraphs(article_content)
+        # Filter the paragraphs on the page tree instead of re-parsing the content
+        article_content = "\n".join(
+            cleaned
+            for cleaned in (clean_bbc_intro_paragraphs(root) for root in content_roots)
+            if cleaned
+        )
 
     return article_content
 
@@ -299,8 +622,26 @@ def author(entry, soup):
         return ""
 
 
+def save_raw_news(news_data, source_name):
+    """
+    Save the fetched news of one source to raw/ for debugging.
+    """
+    current_time = datetime.datetime.now()
+    fetch_dir = f"raw/{source_name}_{current_time.strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs("raw", exist_ok=True)
+    with open(fetch_dir, "w", encoding="utf-8") as f:
+        json.dump(news_data, f, ensure_ascii=False, indent=4)
+    logging.info(f"Fetched data saved to {fetch_dir}")
+
+
 def run_f1_news_crawler(
-    rss_url, fetch_days, container_attrs, output_dir, source_name, debug=False
+    rss_url,
+    fetch_days,
+    container_attrs,
+    output_dir,
+    source_name,
+    debug=False,
+    async_mode=False,
 ):
     """
     Run the F1 news crawler for a specific RSS feed.
@@ -311,21 +652,274 @@ def run_f1_news_crawler(
         output_dir (str): The directory to save the JSON file.
         source_name (str): The name of the news source.
         debug (bool): Whether to save output in debug mode.
+        async_mode (bool): Download the articles concurrently.
     """
     executed_at = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
-    news_data = fetch_f1_news(rss_url, fetch_days, container_attrs=container_attrs)
+    news_data = fetch_f1_news(
+        rss_url, fetch_days, container_attrs=container_attrs, async_mode=async_mode
+    )
     if news_data is not None:
         for item in news_data:
             item["source"] = source_name
 
     if debug:
-        current_time = datetime.datetime.now()
-        fetch_dir = f"raw/{source_name}_{current_time.strftime('%Y%m%d_%H%M%S')}.json"
-        os.makedirs("raw", exist_ok=True)
-        with open(fetch_dir, "w", encoding="utf-8") as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=4)
-        logging.info(f"Fetched data saved to {fetch_dir}")
+        save_raw_news(news_data, source_name)
     else:
         logging.info("Debug mode is off in Step 1, not saving translated data.")
 
     return news_data
+
+
+async def crawl_feed(
+    client,
+    limiter,
+    feed,
+    fetch_days,
+    debug=False,
+    timeout=None,
+    state=None,
+    seen=None,
+    on_article=None,
+    pending=None,
+):
+    """
+    Crawl one feed of the registry and time it.
+
+    Args:
+        client (httpx.AsyncClient): Shared HTTP client.
+        limiter (HostLimiter): Shared per-host concurrency limiter.
+        feed (dict): Registry entry with 'url', 'container_attrs' and 'source'.
+        fetch_days (int): Number of days to fetch news for.
+        debug (bool): Whether to save output in debug mode.
+        timeout (float, optional): Seconds of network time (RSS and article
+            downloads) before the feed is abandoned. Time spent waiting for
+            `on_article` is not counted.
+        state (FeedStateStore, optional): ETag / Last-Modified store for conditional requests.
+        seen (SeenLinkIndex, optional): Links already ingested; they are not downloaded again.
+        on_article (coroutine function, optional): Streaming callback, see `fetch_f1_news_async`.
+        pending (asyncio.Semaphore, optional): Shared streaming limit, see `fetch_f1_news_async`.
+
+    Returns:
+        tuple: (news list or None, report dict with 'source', 'url', 'status',
+               'articles', 'seconds' and 'validators'). 'validators' holds the
+               feed's ETag / Last-Modified when it was crawled successfully (None
+               otherwise); store them with `state.update` only after the feed's
+               articles were uploaded.
+    """
+    source_name = feed["source"]
+    validators = {}
+    streamed = []
+    emitted = 0
+
+    async def emit(item):
+        nonlocal emitted
+        item["source"] = source_name
+        emitted += 1
+        if debug:
+            streamed.append(item)
+        await on_article(item)
+
+    start = time.perf_counter()
+    clock = FeedClock(timeout)
+    try:
+        news_data = await clock.run(
+            fetch_f1_news_async(
+                feed["url"],
+                fetch_days,
+                container_attrs=feed["container_attrs"],
+                client=client,
+                limiter=limiter,
+                state=state,
+                seen=seen,
+                on_article=emit if on_article else None,
+                validators=validators,
+                pending=pending,
+                clock=clock,
+            )
+        )
+        status = "ok" if news_data is not None else "failed"
+    except asyncio.TimeoutError:
+        logging.warning(f"{source_name} timed out after {timeout}s, skipping.")
+        news_data = None
+        status = "timeout"
+    elapsed = time.perf_counter() - start
+
+    if news_data is not None:
+        for item in news_data:
+            item["source"] = source_name
+        if debug:
+            save_raw_news(news_data if on_article is None else streamed, source_name)
+
+    timing = {
+        "source": source_name,
+        "url": feed["url"],
+        "status": status,
+        "articles": emitted if on_article else len(news_data or []),
+        "seconds": round(elapsed, 2),
+        "validators": validators if status == "ok" and validators else None,
+    }
+    return news_data, timing
+
+
+async def crawl_feeds_async(
+    feeds,
+    fetch_days,
+    debug=False,
+    feed_timeout=FEED_TIMEOUT,
+    state=None,
+    seen=None,
+    on_article=None,
+    max_pending=None,
+):
+    """
+    Crawl all feeds concurrently with one shared HTTP client, see `crawl_feeds`
+    and `iter_feeds`. In streaming mode at most `max_pending` articles of all
+    feeds are downloaded and not yet handed to `on_article`.
+    """
+    async with create_async_client() as client:
+        limiter = HostLimiter()
+        pending = asyncio.Semaphore(max_pending) if on_article and max_pending else None
+        results = await asyncio.gather(
+            *(
+                crawl_feed(
+                    client,
+                    limiter,
+                    feed,
+                    fetch_days,
+                    debug,
+                    feed_timeout,
+                    state,
+                    seen,
+                    on_article,
+                    pending,
+                )
+                for feed in feeds
+            )
+        )
+
+    all_news_data = []
+    report = []
+    for news_data, timing in results:
+        if news_data:
+            all_news_data.extend(news_data)
+        report.append(timing)
+    return all_news_data, report
+
+
+def crawl_feeds(
+    feeds, fetch_days, debug=False, feed_timeout=FEED_TIMEOUT, state=None, seen=None
+):
+    """
+    Crawl every feed of the registry concurrently. A feed that fails or runs
+    longer than `feed_timeout` is skipped; the others are still returned.
+
+    Args:
+        feeds (list): Feed registry entries, see feeds.FEEDS.
+        fetch_days (int): Number of days to fetch news for.
+        debug (bool): Whether to save each source's output to raw/.
+        feed_timeout (float): Seconds allowed per feed.
+        state (FeedStateStore, optional): ETag / Last-Modified store. Unchanged
+            feeds are skipped. The store is not updated here, see
+            `pipeline.store_feed_validators`.
+        seen (SeenLinkIndex, optional): Links already ingested; they are not downloaded again.
+
+    Returns:
+        tuple: (news list in registry order, per-feed report, see `crawl_feed`)
+    """
+    all_news_data, report = asyncio.run(
+        crawl_feeds_async(
+            feeds,
+            fetch_days,
+            debug=debug,
+            feed_timeout=feed_timeout,
+            state=state,
+            seen=seen,
+        )
+    )
+    log_feed_report(report)
+    return all_news_data, report
+
+
+def iter_feeds(
+    feeds,
+    fetch_days,
+    debug=False,
+    feed_timeout=FEED_TIMEOUT,
+    state=None,
+    seen=None,
+    max_pending=MAX_PENDING_ARTICLES,
+    report=None,
+):
+    """
+    Streaming version of `crawl_feeds`: yields every news item as soon as it is
+    parsed. The crawl runs in a background thread. An article is only
+    downloaded once one of `max_pending` slots is free, and its slot is released
+    when the item is in the queue (itself bounded by `max_pending`), so the
+    downloads pause while the consumer (clean / upload) catches up and memory
+    stays bounded whatever the size of the feeds.
+
+    Args:
+        feeds (list): Feed registry entries, see feeds.FEEDS.
+        fetch_days (int): Number of days to fetch news for.
+        debug (bool): Whether to save each source's output to raw/.
+        feed_timeout (float): Seconds allowed per feed.
+        state (FeedStateStore, optional): ETag / Last-Modified store for conditional
+            requests. It is not updated here, see `pipeline.store_feed_validators`.
+        seen (SeenLinkIndex, optional): Links already ingested; they are not downloaded again.
+        max_pending (int): Maximum number of parsed items waiting for the consumer.
+        report (list, optional): Filled with the per-feed report (see `crawl_feed`)
+            when the crawl has finished.
+
+    Yields:
+        dict: News items, tagged with their 'source'.
+    """
+    articles = queue.Queue(maxsize=max_pending)
+    done = object()
+    if report is None:
+        report = []
+
+    async def put(item):
+        # Blocking put in the default executor so the event loop keeps running
+        await asyncio.get_running_loop().run_in_executor(None, articles.put, item)
+
+    def crawl():
+        try:
+            _, feed_report = asyncio.run(
+                crawl_feeds_async(
+                    feeds,
+                    fetch_days,
+                    debug=debug,
+                    feed_timeout=feed_timeout,
+                    state=state,
+                    seen=seen,
+                    on_article=put,
+                    max_pending=max_pending,
+                )
+            )
+            report.extend(feed_report)
+        except Exception as e:
+            logging.error(f"Error while crawling feeds: {e}", exc_info=True)
+        finally:
+            articles.put(done)
+
+    crawler = threading.Thread(target=crawl, name="feed-crawler", daemon=True)
+    crawler.start()
+    while True:
+        item = articles.get()
+        if item is done:
+            break
+        yield item
+    crawler.join()
+    log_feed_report(report)
+
+
+def log_feed_report(report):
+    """
+    Log the per-feed timing report, slowest feed first.
+    """
+    logging.info("Feed timing report (slowest first):")
+    for timing in sorted(report, key=lambda t: t["seconds"], reverse=True):
+        logging.info(
+            f"  {timing['source']:<25} {timing['status']:<8} "
+            f"{timing['articles']:>3} articles {timing['seconds']:>7.2f}s"
+        )
@@ -0,0 +1,123 @@
+import os
+from bs4 import BeautifulSoup, Tag
+
+
+def default_parser():
+    """
+    Use the C based lxml parser when it is installed, otherwise fall back to
+    Python's built-in html.parser.
+    """
+    try:
+        import lxml  # noqa: F401
+
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+# BeautifulSoup tree builder used across the crawler ("lxml", "html.parser", "html5lib")
+HTML_PARSER = os.getenv("HTML_PARSER") or default_parser()
+
+# Tags that start a new segment in `split_blocks`; anything else is inline
+BLOCK_TAGS = {
+    "p",
+    "div",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "ul",
+    "ol",
+    "li",
+    "table",
+    "blockquote",
+    "pre",
+    "section",
+    "article",
+    "figure",
+    "hr",
+}
+
+
+def make_soup(markup, parser=None):
+    """
+    Parse a full HTML page with the configured parser backend.
+    """
+    return BeautifulSoup(markup, parser or HTML_PARSER)
+
+
+def parse_fragment(markup, parser=None):
+    """
+    Parse an HTML fragment such as the scraped article content.
+    Use `render_fragment` to turn it back into HTML.
+    """
+    return BeautifulSoup(markup, parser or HTML_PARSER)
+
+
+def html_to_text(markup, parser=None):
+    """
+    Visible text of an HTML fragment, blocks separated by spaces.
+    """
+    if not markup:
+        return ""
+    return parse_fragment(markup, parser).get_text(" ", strip=True)
+
+
+def render_fragment(soup):
+    """
+    Serialise a tree built by `parse_fragment`. lxml and html5lib wrap fragments
+    in <html><head><body>, which is dropped again here so every backend returns
+    the fragment itself.
+    """
+    if soup.builder.NAME == "html.parser":
+        return str(soup)
+    return "".join(str(node) for node in fragment_nodes(soup))
+
+
+def fragment_nodes(soup):
+    """
+    Top-level nodes of a tree built by `parse_fragment`, without the
+    <html><head><body> wrapper added by lxml and html5lib.
+    """
+    if soup.builder.NAME == "html.parser":
+        return list(soup.contents)
+
+    nodes = []
+    for node in soup.contents:
+        if isinstance(node, Tag) and node.name == "html":
+            for child in node.contents:
+                if isinstance(child, Tag) and child.name in ("head", "body"):
+                    nodes.extend(child.contents)
+                else:
+                    nodes.append(child)
+        else:
+            nodes.append(node)
+    return nodes
+
+
+def split_blocks(markup):
+    """
+    Split an HTML fragment into its top-level blocks (paragraphs, headings,
+    lists, tables ...). Inline nodes between blocks are grouped into one
+    segment and whitespace-only segments are dropped. Joining the segments
+    gives the same blocks in order, without the whitespace between them and
+    as serialised by the parser, not the original markup byte for byte.
+
+    Returns:
+        list: HTML string of every segment, in document order.
+    """
+    segments = []
+    inline = []
+    for node in fragment_nodes(parse_fragment(markup)):
+        if isinstance(node, Tag) and node.name in BLOCK_TAGS:
+            if "".join(inline).strip():
+                segments.append("".join(inline))
+            inline = []
+            segments.append(str(node))
+        else:
+            inline.append(str(node))
+    if "".join(inline).strip():
+        segments.append("".join(inline))
+    return segments
@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout
+from rate_limit import TokenBucket, backoff_delay
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
+)
+# Gemini request quota shared by the translate / content edit / title edit stages
+REQUESTS_PER_MINUTE = int(os.getenv("REQUESTS_PER_MINUTE", "5"))
+# Seconds to wait for one generateContent response
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+# Keep-alive connections kept open to the model endpoint
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+LLM_RETRIES = 3
+
+_client = None
+_lock = threading.Lock()
+
+
+class RetryableAPIError(Exception):
+    """
+    Raised for 429 / 5xx responses, which are retried with backoff.
+    """
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"Gemini API returned {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_result(text):
+    """
+    Text after the "Result:" marker the prompts ask for, None when missing.
+    """
+    if text and "Result:" in text:
+        return text.split("Result:", 1)[1].strip()
+    return None
+
+
+class LLMClient:
+    """
+    Gemini generateContent client shared by every stage: one keep-alive
+    session (the TLS handshake is paid once per connection instead of once
+    per call), one rate limiter, one retry / timeout policy, and per-call
+    latency metrics.
+    """
+
+    def __init__(
+        self,
+        api_url=GEMINI_API_URL,
+        api_key=GEMINI_API_KEY,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        timeout=LLM_TIMEOUT,
+        pool_size=LLM_POOL_SIZE,
+    ):
+        self.url = f"{api_url}?key={api_key}"
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(requests_per_minute)
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.calls = []
+        self._metrics_lock = threading.Lock()
+
+    def generate(self, prompt, response_schema=None):
+        """
+        Send one generateContent request.
+
+        Args:
+            prompt (str): The full prompt.
+            response_schema (dict, optional): Ask for JSON output following this schema.
+
+        Returns:
+            str: Text of the first candidate, None when the request failed.
+
+        Raises:
+            RetryableAPIError: For 429 / 5xx responses.
+            requests.exceptions.Timeout: When no response came within the timeout.
+        """
+        payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if response_schema:
+            # 要求模型直接回傳符合 schema 的 JSON
+            payload["generationConfig"] = {
+                "responseMimeType": "application/json",
+                "responseSchema": response_schema,
+            }
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+            if response.status_code == 429 or response.status_code >= 500:
+                retry_after = response.headers.get("Retry-After")
+                raise RetryableAPIError(
+                    response.status_code,
+                    float(retry_after) if retry_after and retry_after.isdigit() else None,
+                )
+            if response.status_code == 200:
+                response_data = response.json()
+                if "candidates" in response_data and len(response_data["candidates"]) > 0:
+                    ok = True
+                    return response_data["candidates"][0]["content"]["parts"][0]["text"]
+                else:
+                    logging.error(
+                        f"Unexpected response format: {response_data}", exc_info=True
+                    )
+                    return None
+            else:
+                logging.error(
+                    f"Request failed with status code {response.status_code}: {response.text}",
+                    exc_info=True,
+                )
+                return None
+        except Timeout:
+            raise
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request failed with error: {e}", exc_info=True)
+            return None
+        finally:
+            self._record(time.perf_counter() - start, ok)
+
+    def complete(self, prompt, parse=parse_result, response_schema=None, retries=LLM_RETRIES):
+        """
+        Send a prompt with rate limiting and retries until `parse` accepts the answer.
+
+        Args:
+            prompt (str): The full prompt.
+            parse (callable): Turns the answer text into the result, or returns None
+                to retry. Defaults to the "Result:" format.
+            response_schema (dict, optional): Ask for JSON output following this
+                schema; the answer is then decoded before `parse` sees it.
+            retries (int): Number of attempts.
+
+        Returns:
+            The parsed result, None when every attempt failed.
+        """
+        for attempt in range(1, retries + 1):
+            try:
+                # 由 token bucket 控制所有 worker 的總請求數
+                self.rate_limiter.acquire()
+                text = self.generate(prompt, response_schema=response_schema)
+                if text is not None and response_schema:
+                    text = json.loads(text)
+                result = parse(text) if text is not None else None
+                if result is not None:
+                    return result
+                logging.warning(f"LLM attempt {attempt} failed. Retrying...")
+            except RetryableAPIError as e:
+                delay = backoff_delay(attempt, e.retry_after)
+                logging.warning(f"{e} on attempt {attempt}. Backing off for {delay:.1f}s...")
+                # 暫停所有 worker，避免繼續打到 quota
+                self.rate_limiter.pause(delay)
+                continue
+            except Timeout:
+                if attempt == retries:
+                    logging.warning(f"LLM timeout on attempt {attempt}. Skipping for now.")
+                    break
+                logging.warning(f"LLM timeout on attempt {attempt}. Retrying...")
+            except Exception as e:
+                logging.warning(f"Unexpected error on attempt {attempt}: {e}")
+            if attempt < retries:
+                time.sleep(random.uniform(3, 5))
+        return None
+
+    def _record(self, seconds, ok):
+        with self._metrics_lock:
+            self.calls.append((seconds, ok))
+
+    def mark(self):
+        """
+        Position in the call log, pass it to `stats` to only cover later calls.
+        """
+        with self._metrics_lock:
+            return len(self.calls)
+
+    def stats(self, since=0):
+        """
+        Args:
+            since (int): Only include the calls made after this `mark()`.
+
+        Returns:
+            dict: Number of calls and errors, and the mean / p50 / p95 / max
+                  latency in seconds.
+        """
+        with self._metrics_lock:
+            calls = self.calls[since:]
+        latencies = sorted(seconds for seconds, _ in calls)
+        errors = sum(1 for _, ok in calls if not ok)
+        if not latencies:
+            return {"calls": 0, "errors": 0}
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "calls": len(latencies),
+            "errors": errors,
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": latencies[-1],
+        }
+
+    def log_stats(self, stage, since=0):
+        stats = self.stats(since)
+        if not stats["calls"]:
+            return
+        logging.info(
+            f"{stage}: {stats['calls']} LLM calls, {stats['errors']} errors, "
+            f"latency mean {stats['mean']:.2f}s / p50 {stats['p50']:.2f}s / "
+            f"p95 {stats['p95']:.2f}s / max {stats['max']:.2f}s"
+        )
+
+
+def get_llm_client():
+    """
+    Return the shared LLM client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
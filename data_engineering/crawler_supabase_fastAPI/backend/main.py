@@ -1,14 +1,25 @@
-from fetch_news import run_f1_news_crawler
+# 先載入 .env，feed_state、seen_links、html_parser 等模組在 import 時就會讀取環境變數
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fetch_news import crawl_feeds
+from feeds import FEEDS
+from feed_state import FeedStateStore
 from merge_and_clean import merge_and_clean_data
 from upload_to_supabase import upload_to_supabase
+from supabase_client import get_supabase
+from seen_links import SeenLinkIndex
+from pipeline import run_ingest_pipeline, store_feed_validators
 import datetime
 import json
 import logging
+import os
 import sys
-from dotenv import load_dotenv
 from translate_news import fetch_and_translate_column
 from content_editor import content_edit
 from title_editor import title_edit
+from scheduler import run_scheduler
 
 # 設置 logging，輸出到標準輸出 (stdout)
 logging.basicConfig(
@@ -24,6 +35,18 @@ if __name__ == "__main__":
         table_name = "f1_news"
         # Number of days to fetch news from
         fetch_days = 1
+        # Seconds allowed per feed before it is skipped
+        feed_timeout = 180
+        # Stream articles through fetch → clean → upload. Set to False for large
+        # backfills to fetch everything first and clean it with a process pool.
+        streaming = True
+        # Articles per upsert request in the streaming pipeline
+        upload_batch_size = 10
+        # Processes used to clean large batches when streaming is off
+        clean_workers = os.cpu_count()
+        # Run translate / content edit / title edit as overlapping work-queue stages
+        # (needs sql/001_work_queue_leases.sql). Falls back to the sequential stages.
+        use_scheduler = True
 
         # Debug flags for different steps
         step1_debug = False  # For Fetch News
@@ -40,157 +63,110 @@ if __name__ == "__main__":
 
         translated_output_dir = f"data" if step3_debug else None
 
-        # 用於存放所有資料來源的新聞
-        all_news_data = []
-
         # Step 1: Fetch news from different sources
         logging.info("Step 1: Fetching news from different sources.")
 
-        # Autosport
-        autosport_url = "https://www.autosport.com/rss/feed/f1"
-        autosport_container_attrs = {"class": "ms-article-content"}
-        autosport_source = "Autosport"
-        autosport_news = run_f1_news_crawler(
-            autosport_url,
-            fetch_days,
-            autosport_container_attrs,
-            output_dir,
-            autosport_source,
-            debug=step1_debug,
-        )
-        if autosport_news:
-            all_news_data.extend(autosport_news)
-
-        # BBC
-        bbc_url = "https://feeds.bbci.co.uk/sport/formula1/rss.xml"
-        bbc_container_attrs = {"data-component": "text-block"}
-        bbc_source = "BBC"
-        bbc_news = run_f1_news_crawler(
-            bbc_url,
-            fetch_days,
-            bbc_container_attrs,
-            output_dir,
-            bbc_source,
-            debug=step1_debug,
-        )
-        if bbc_news:
-            all_news_data.extend(bbc_news)
-
-        # # Motorsport
-        motorsport_url = "https://www.motorsport.com/rss/f1/news/"
-        motorsport_container_attrs = {"class": "ms-article-content"}
-        motorsport_source = "Motorsport"
-        motorsport_news = run_f1_news_crawler(
-            motorsport_url,
-            fetch_days,
-            motorsport_container_attrs,
-            output_dir,
-            motorsport_source,
-            debug=step1_debug,
-        )
-        if motorsport_news:
-            all_news_data.extend(motorsport_news)
-
-        # Racefans
-        racefans_url = "https://www.racefans.net/feed/"
-        racefans_container_attrs = {"class": "entry-content"}
-        racefans_source = "RaceFans"
-        racefans_news = run_f1_news_crawler(
-            racefans_url,
-            fetch_days,
-            racefans_container_attrs,
-            output_dir,
-            racefans_source,
-            debug=step1_debug,
-        )
-        if racefans_news:
-            all_news_data.extend(racefans_news)
-
-        # # Pitpass
-        pitpass_url = "https://www.pitpass.com/fes_php/fes_usr_sit_newsfeed.php"
-        pitpass_container_attrs = {"class": "KonaBody"}
-        pitpass_source = "Pitpass"
-        pitpass_news = run_f1_news_crawler(
-            pitpass_url,
-            fetch_days,
-            pitpass_container_attrs,
-            output_dir,
-            pitpass_source,
-            debug=step1_debug,
-        )
-        if pitpass_news:
-            all_news_data.extend(pitpass_news)
-
-        # # f1technical_news
-        f1technical_news_url = "https://www.f1technical.net/rss/news.xml"
-        f1technical_news_container_attrs = {"class": "content article"}
-        f1technical_news_source = "F1 Technical News"
-        f1technical_news = run_f1_news_crawler(
-            f1technical_news_url,
-            fetch_days,
-            f1technical_news_container_attrs,
-            output_dir,
-            f1technical_news_source,
-            debug=step1_debug,
-        )
-        if f1technical_news:
-            all_news_data.extend(f1technical_news)
-
-        # # f1technical_articles
-        f1technical_articles_url = "https://www.f1technical.net/rss/articles.xml"
-        f1technical_articles_container_attrs = {"class": "content article"}
-        f1technical_articles_source = "F1 Technical Articles"
-        f1technical_articles = run_f1_news_crawler(
-            f1technical_articles_url,
-            fetch_days,
-            f1technical_articles_container_attrs,
-            output_dir,
-            f1technical_articles_source,
-            debug=step1_debug,
-        )
-        if f1technical_articles:
-            all_news_data.extend(f1technical_articles)
-
-        logging.info(f"Fetched {len(all_news_data)} news articles from all sources.")
-        # logging.info("Step 2: Merging and cleaning fetched data.")
-
-        # Step 2: Merge and clean the fetched data
-
-        cleaned_data = merge_and_clean_data(
-            all_news_data, output_dir=clean_dir, debug=step2_debug
-        )
-
-        raw_data = upload_to_supabase(
-            table_name, cleaned_data, created=True, updated=True
-        )
-
-        if raw_data:
-            logging.info(f"Uploaded {len(cleaned_data)} articles to Supabase.")
+        # Links already in Supabase are not downloaded again
+        seen_links = SeenLinkIndex()
+        seen_links.prefetch(get_supabase(), table_name, days=fetch_days + 1)
+
+        feed_state = FeedStateStore()
+
+        if streaming:
+            # Step 1 + 2: every article is cleaned and upserted as soon as it is fetched
+            ingest = run_ingest_pipeline(
+                FEEDS,
+                fetch_days,
+                table_name,
+                batch_size=upload_batch_size,
+                feed_timeout=feed_timeout,
+                state=feed_state,
+                seen=seen_links,
+                debug=step1_debug,
+                collect=step2_debug or step3_debug,
+            )
+            cleaned_data = ingest["articles"]
+            if step2_debug and clean_dir:
+                os.makedirs(os.path.dirname(clean_dir), exist_ok=True)
+                with open(clean_dir, "w", encoding="utf-8") as f:
+                    json.dump(cleaned_data, f, ensure_ascii=False, indent=4)
+                logging.info(f"Cleaned data saved to {clean_dir}")
         else:
-            logging.error("Failed to upload articles to Supabase.")
+            all_news_data, feed_report = crawl_feeds(
+                FEEDS,
+                fetch_days,
+                debug=step1_debug,
+                feed_timeout=feed_timeout,
+                state=feed_state,
+                seen=seen_links,
+            )
 
-        logging.info("Step 2: completed successfully.")
-        logging.info("Step 3: Please wait, Translating the cleaned data......")
+            logging.info(
+                f"Fetched {len(all_news_data)} news articles from all sources."
+            )
 
-        # Step 3: Translate the merged data
-        try:
-            translated = fetch_and_translate_column(
-                cleaned_data, output_dir=translated_output_dir, debug=step3_debug
+            # Step 2: Merge and clean the fetched data
+            cleaned_data = merge_and_clean_data(
+                all_news_data,
+                output_dir=clean_dir,
+                debug=step2_debug,
+                workers=clean_workers,
             )
-            if translated:
-                logging.info(f"Translated {len(translated)} articles.")
-                logging.info("Translation completed successfully.")
+
+            if cleaned_data:
+                raw_data = upload_to_supabase(
+                    table_name, cleaned_data, created=True, updated=True
+                )
+
+                logging.info(f"Uploaded {len(raw_data['data'])} articles to Supabase.")
+                if raw_data["failed"]:
+                    logging.error(
+                        f"Failed to upload {len(raw_data['failed'])} articles to Supabase."
+                    )
+                seen_links.add(row.get("link") for row in raw_data["data"])
+                seen_links.save()
+                failed_sources = {f["row"].get("source") for f in raw_data["failed"]}
             else:
-                logging.warning("No data was returned from fetch_and_translate_column.")
-        except Exception as e:
-            logging.error(f"Error during translation: {e}", exc_info=True)
+                logging.info("No new articles to upload.")
+                failed_sources = set()
+            # 上傳完成後才記錄 ETag，失敗的 feed 下次會重新抓取
+            store_feed_validators(feed_state, feed_report, failed_sources)
 
-        try:
-            content_edit(translated_output_dir, debug=step3_debug)
-            title_edit(translated_output_dir, debug=step3_debug)
+        logging.info("Step 2: completed successfully.")
+        logging.info("Step 3: Please wait, Translating the cleaned data......")
 
-        except Exception as e:
-            logging.error(f"Error during editing: {e}", exc_info=True)
+        scheduled = False
+        if use_scheduler and not step3_debug:
+            # Step 3 + 4: articles move to editing as soon as their translation lands
+            try:
+                run_scheduler()
+                scheduled = True
+            except Exception as e:
+                logging.error(
+                    f"Scheduler unavailable, running the stages one by one: {e}",
+                    exc_info=True,
+                )
+
+        if not scheduled:
+            # Step 3: Translate the merged data
+            try:
+                translated = fetch_and_translate_column(
+                    cleaned_data, output_dir=translated_output_dir, debug=step3_debug
+                )
+                if translated:
+                    logging.info(f"Translated {len(translated)} articles.")
+                    logging.info("Translation completed successfully.")
+                else:
+                    logging.warning("No data was returned from fetch_and_translate_column.")
+            except Exception as e:
+                logging.error(f"Error during translation: {e}", exc_info=True)
+
+            try:
+                content_edit(translated_output_dir, debug=step3_debug)
+                title_edit(translated_output_dir, debug=step3_debug)
+
+            except Exception as e:
+                logging.error(f"Error during editing: {e}", exc_info=True)
 
     except Exception as e:
         logging.error(f"An error occurred: {e}", exc_info=True)
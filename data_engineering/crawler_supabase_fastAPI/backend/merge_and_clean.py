@@ -2,109 +2,238 @@ import os
 import json
 import re
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import NavigableString, Tag
+from html_parser import parse_fragment, render_fragment
 
+# 少於此筆數時不啟動 process pool（啟動行程的成本比清理還高）
+PARALLEL_MIN_ITEMS = 50
 
-def clean_data(data):
+
+class CleanRules:
+    """
+    預先編譯的清理規則，讓 apply_clean_rules 只需走訪一次 HTML 樹。
+    Args:
+        remove_tags (list): 整個移除的標籤名稱。
+        class_selectors (dict): {標籤名稱: [class 子字串]}，class 含有該子字串就移除。
+        id_prefixes (list): id 以此開頭就移除。
+        id_substrings (list): id 含有此子字串就移除。
+        rename_tags (dict): {舊標籤: 新標籤}，只保留文字，例如 a → b。
+        unwanted_texts (list): 從所有文字節點中刪除的字串。
+    """
+
+    def __init__(
+        self,
+        remove_tags=(),
+        class_selectors=None,
+        id_prefixes=(),
+        id_substrings=(),
+        rename_tags=None,
+        unwanted_texts=(),
+    ):
+        self.remove_tags = frozenset(remove_tags)
+        self.class_selectors = {
+            tag_name: tuple(class_list)
+            for tag_name, class_list in (class_selectors or {}).items()
+        }
+        self.id_prefixes = tuple(id_prefixes)
+        self.id_substrings = tuple(id_substrings)
+        self.rename_tags = dict(rename_tags or {})
+        self.unwanted_texts = tuple(unwanted_texts)
+
+    def should_remove(self, tag):
+        if tag.name in self.remove_tags:
+            return True
+
+        class_names = self.class_selectors.get(tag.name)
+        if class_names:
+            classes = tag.get("class")
+            if isinstance(classes, str):
+                classes = [classes]
+            for value in classes or ():
+                if value and any(name in value for name in class_names):
+                    return True
+
+        tag_id = tag.get("id")
+        if tag_id and (
+            tag_id.startswith(self.id_prefixes)
+            or any(part in tag_id for part in self.id_substrings)
+        ):
+            return True
+        return False
+
+    def scrub(self, text):
+        """
+        刪除文字中不需要的字串。
+        """
+        for unwanted in self.unwanted_texts:
+            if unwanted in text:
+                text = text.replace(unwanted, "")
+        return text
+
+
+CLEAN_RULES = CleanRules(
+    # 移除所有指定標籤
+    remove_tags=[
+        "span",
+        "strong",
+        "em",
+        "section",
+        "small",
+        "figcaption",
+        "img",
+        "figure",
+        "script",
+        "h4",
+    ],
+    # 移除特定class的標籤
+    class_selectors={
+        "ul": ["lcp_catlist"],
+        "div": ["tnp", "tnp-subscription", "alignright"],
+        "p": ["text-above-ad"],
+    },
+    # 移除特定ID的標籤
+    id_prefixes=["article-mpu"],
+    # 特別處理 snack_dex 系列ID
+    id_substrings=["snack_dex"],
+    # 替換a to b
+    rename_tags={"a": "b"},
+    unwanted_texts=[
+        "Become a RaceFans supporter",
+        "Go ad-free for just £1 per month",
+        "Find out more and sign up",
+    ],
+)
+
+
+def replace_child(parent, index, new_child):
+    """
+    把 parent.contents[index] 換成 new_child。index 由呼叫端提供，
+    bs4 的 replace_with 則每次都要線性搜尋 parent.contents。
+    """
+    parent.contents[index].extract(_self_index=index)
+    parent.insert(index, new_child)
+
+
+def apply_clean_rules(soup, rules=CLEAN_RULES):
+    """
+    一次走訪 HTML 樹並套用所有清理規則（移除標籤、class/id、a → b、刪除文字）。
+    Args:
+        soup (BeautifulSoup): 文章內容的 HTML 樹，會直接被修改。
+        rules (CleanRules): 清理規則。
+    """
+    # (parent, index, 是否位於要替換的標籤內, 是否為替換標記)
+    # 每個 parent 的子節點由後往前處理：刪除或替換只影響已處理過的位置，
+    # 尚未處理的節點 index 不變，可以直接交給 extract，不必搜尋 parent.contents
+    stack = [(soup, index, False, False) for index in range(len(soup.contents))]
+    while stack:
+        parent, index, in_renamed, rename = stack.pop()
+        node = parent.contents[index]
+        if rename:
+            # 子節點都清理完才替換，取得的文字與逐一規則處理時相同。
+            # 直接改名並清掉屬性，比建立新標籤再插入樹中便宜
+            text = rules.scrub(node.get_text())
+            node.name = rules.rename_tags[node.name]
+            node.attrs = {}
+            node.can_be_empty_element = soup.builder.can_be_empty_element(node.name)
+            contents = node.contents
+            if len(contents) == 1 and type(contents[0]) is NavigableString:
+                if contents[0] != text:
+                    replace_child(node, 0, text)
+            else:
+                node.string = text
+        elif isinstance(node, Tag):
+            if rules.should_remove(node):
+                node.extract(_self_index=index)
+                continue
+            if node.name in rules.rename_tags:
+                stack.append((parent, index, in_renamed, True))
+                in_renamed = True
+            stack.extend(
+                (node, child, in_renamed, False) for child in range(len(node.contents))
+            )
+        elif isinstance(node, NavigableString) and not in_renamed:
+            cleaned = rules.scrub(str(node))
+            if cleaned != node:
+                replace_child(parent, index, cleaned)
+
+
+def clean_content(html, rules=CLEAN_RULES):
+    """
+    清理單篇文章的 HTML 內容。
+    Args:
+        html (str): 文章的 HTML 內容。
+        rules (CleanRules): 清理規則。
+    Returns:
+        str: 清理後的 HTML。
+    """
+    # 使用BeautifulSoup處理HTML（parser 由 html_parser.HTML_PARSER 決定）
+    soup = parse_fragment(html)
+
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    # 記錄處理前的狀態
+    if debug_enabled:
+        has_alignright_before = bool(soup.select("div.alignright"))
+        logging.debug(f"Before cleaning: has alignright div: {has_alignright_before}")
+
+    apply_clean_rules(soup, rules)
+
+    # 記錄處理後的狀態
+    if debug_enabled:
+        has_alignright_after = bool(soup.select("div.alignright"))
+        logging.debug(f"After cleaning: has alignright div: {has_alignright_after}")
+
+    return render_fragment(soup)
+
+
+def clean_data(data, workers=None):
     """
     清理資料的函式。
     Args:
         data (list): 從 JSON 文件中讀取的新聞資料列表。
+        workers (int, optional): process pool 的行程數。None 或 1 時在目前行程清理；
+            少於 PARALLEL_MIN_ITEMS 筆時也會退回單行程。
     Returns:
         list: 清理後的新聞資料列表。
     """
-    for item in data:
-        if "content" in item and isinstance(item["content"], str):
-            # 使用BeautifulSoup處理HTML
-            # 使用BeautifulSoup處理HTML
-            soup = BeautifulSoup(item["content"], "html.parser")
-
-            # 記錄處理前的狀態
-            has_alignright_before = bool(soup.select("div.alignright"))
-            logging.debug(
-                f"Before cleaning: has alignright div: {has_alignright_before}"
+    targets = [
+        item
+        for item in data
+        if "content" in item and isinstance(item["content"], str)
+    ]
+    contents = [item["content"] for item in targets]
+
+    if workers and workers > 1 and len(contents) >= PARALLEL_MIN_ITEMS:
+        # BeautifulSoup 是 CPU-bound，分批交給多個行程；map 會保持原本順序
+        chunksize = max(1, len(contents) // (workers * 4))
+        logging.info(
+            f"Cleaning {len(contents)} articles with {workers} processes (chunksize={chunksize})."
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            cleaned_contents = list(
+                executor.map(clean_content, contents, chunksize=chunksize)
             )
+    else:
+        cleaned_contents = [clean_content(content) for content in contents]
 
-            # 移除所有指定標籤 - 使用一致的方法
-            tags_to_remove = [
-                "span",
-                "strong",
-                "em",
-                "section",
-                "small",
-                "figcaption",
-                "img",
-                "figure",
-                "script",
-                "h4",
-            ]
-            for tag_name in tags_to_remove:
-                for tag in soup.find_all(tag_name):
-                    tag.decompose()
-
-            # 移除特定class的標籤
-            class_selectors = {
-                "ul": ["lcp_catlist"],
-                "div": ["tnp", "tnp-subscription", "alignright"],
-                "p": ["text-above-ad"],
-            }
-
-            for tag_name, class_list in class_selectors.items():
-                for class_name in class_list:
-                    for tag in soup.find_all(
-                        tag_name, class_=lambda x: x and class_name in x
-                    ):
-                        tag.decompose()
-
-            # 移除特定ID的標籤
-            id_selectors = ["article-mpu"]
-            for id_prefix in id_selectors:
-                for tag in soup.find_all(id=lambda x: x and x.startswith(id_prefix)):
-                    tag.decompose()
-
-            # 特別處理 snack_dex 系列ID
-            for tag in soup.find_all(id=lambda x: x and "snack_dex" in x):
-                tag.decompose()
-
-            # 記錄處理後的狀態
-            has_alignright_after = bool(soup.select("div.alignright"))
-            logging.debug(f"After cleaning: has alignright div: {has_alignright_after}")
-
-            # 替換a to b
-            a_tags = soup.find_all("a")
-            for a_tag in a_tags:
-                b_tag = soup.new_tag("b")
-                b_tag.string = a_tag.get_text()
-                a_tag.replace_with(b_tag)
-
-            unwanted_texts = [
-                "Become a RaceFans supporter",
-                "Go ad-free for just £1 per month",
-                "Find out more and sign up",
-            ]
-            for text in unwanted_texts:
-                # 在所有文本節點中尋找並移除包含這些文本的標籤
-                for text_node in soup.find_all(text=True):
-                    if text in text_node:
-                        # 如果包含不需要的文本，則替換或移除該文本
-                        text_node.replace_with(text_node.replace(text, ""))
-
-            item["content"] = str(soup)
-            item["translation_status"] = "pending"
-            item["content_zh"] = ""
+    for item, content in zip(targets, cleaned_contents):
+        item["content"] = content
+        item["translation_status"] = "pending"
+        item["content_zh"] = ""
 
     # 過濾掉沒有content的項目
     cleaned_data = [item for item in data if item.get("content")]
     return cleaned_data
 
 
-def merge_and_clean_data(news_data, output_dir=None, debug=False):
+def merge_and_clean_data(news_data, output_dir=None, debug=False, workers=None):
     """
     合併並清理新聞資料，去除重複的 URL，並根據 debug 決定是否儲存到檔案。
     Args:
         news_data (list): 所有來源的新聞資料列表。
         output_dir (str, optional): 儲存清理後資料的檔案路徑（僅在 debug=True 時使用）。
         debug (bool): 是否啟用除錯模式，啟用時會將清理後的資料儲存到檔案。
+        workers (int, optional): 清理時使用的行程數，見 clean_data。
     Returns:
         list: 清理後的新聞資料列表。
     """
@@ -120,7 +249,7 @@ def merge_and_clean_data(news_data, output_dir=None, debug=False):
 
     # 清理資料
 
-    cleaned_data = clean_data(unique_data)
+    cleaned_data = clean_data(unique_data, workers=workers)
 
     # 如果 debug=True，將清理後的資料儲存到檔案
     if debug and output_dir:
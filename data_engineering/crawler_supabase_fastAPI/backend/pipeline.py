@@ -0,0 +1,144 @@
+import logging
+from fetch_news import FEED_TIMEOUT, iter_feeds
+from merge_and_clean import clean_data
+from upload_to_supabase import upload_to_supabase
+
+# Articles per upsert request in the streaming pipeline
+UPLOAD_BATCH_SIZE = 10
+
+
+def dedupe(articles):
+    """
+    Drop articles whose link was already yielded (the same story can appear
+    in two feeds).
+    """
+    seen_links = set()
+    for item in articles:
+        link = item.get("link")
+        if link and link not in seen_links:
+            seen_links.add(link)
+            yield item
+
+
+def clean_articles(articles):
+    """
+    Clean every article as it arrives, see merge_and_clean.clean_data.
+    """
+    for item in articles:
+        yield from clean_data([item])
+
+
+def batched(items, size):
+    """
+    Group a stream into lists of at most `size` items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def store_feed_validators(state, report, failed_sources=()):
+    """
+    Remember the ETag / Last-Modified of every feed that was crawled and whose
+    articles were all uploaded, then save the store. A feed with a failed row
+    keeps its previous validators, so the next run downloads it again instead
+    of getting 304 Not Modified.
+
+    Args:
+        state (FeedStateStore): ETag / Last-Modified store.
+        report (list): Per-feed report of `crawl_feeds` / `iter_feeds`.
+        failed_sources (iterable): Sources with at least one article that was
+            not uploaded.
+
+    Returns:
+        int: Number of feeds whose validators were stored.
+    """
+    failed_sources = set(failed_sources)
+    stored = 0
+    for feed in report:
+        if not feed.get("validators") or feed["source"] in failed_sources:
+            continue
+        state.update(feed["url"], feed["validators"]["etag"], feed["validators"]["modified"])
+        stored += 1
+    if stored:
+        state.save()
+    return stored
+
+
+def run_ingest_pipeline(
+    feeds,
+    fetch_days,
+    table_name="f1_news",
+    batch_size=UPLOAD_BATCH_SIZE,
+    feed_timeout=FEED_TIMEOUT,
+    state=None,
+    seen=None,
+    debug=False,
+    collect=False,
+):
+    """
+    Streaming fetch → clean → upload pipeline. Each article flows through
+    the stages as soon as it is downloaded and is upserted in micro-batches,
+    so the first articles reach Supabase while slower feeds are still being
+    crawled and only a bounded number of articles is held in memory.
+
+    Args:
+        feeds (list): Feed registry entries, see feeds.FEEDS.
+        fetch_days (int): Number of days to fetch news for.
+        table_name (str): Supabase table to upsert into.
+        batch_size (int): Articles per upsert request.
+        feed_timeout (float): Seconds allowed per feed.
+        state (FeedStateStore, optional): ETag / Last-Modified store. A feed's
+            validators are stored once the run has finished and every one of its
+            articles was uploaded.
+        seen (SeenLinkIndex, optional): Links already ingested. Uploaded links are
+            added to it and it is saved at the end.
+        debug (bool): Whether to save each source's raw output to raw/.
+        collect (bool): Keep the cleaned articles and return them (for debugging).
+
+    Returns:
+        dict: 'uploaded' and 'failed' counts, and 'articles' (the cleaned
+              articles when collect=True, otherwise an empty list).
+    """
+    report = []
+    articles = iter_feeds(
+        feeds,
+        fetch_days,
+        debug=debug,
+        feed_timeout=feed_timeout,
+        state=state,
+        seen=seen,
+        report=report,
+    )
+    collected = []
+    uploaded = 0
+    failed = 0
+    failed_sources = set()
+
+    for batch in batched(clean_articles(dedupe(articles)), batch_size):
+        if collect:
+            collected.extend(batch)
+        result = upload_to_supabase(table_name, batch, created=True, updated=True)
+        uploaded += len(result["data"])
+        failed += len(result["failed"])
+        logging.info(f"Uploaded {len(result['data'])} articles ({uploaded} so far).")
+        if result["failed"]:
+            logging.error(
+                f"Failed to upload {len(result['failed'])} articles to Supabase."
+            )
+            failed_sources.update(f["row"].get("source") for f in result["failed"])
+        if seen is not None:
+            seen.add(row.get("link") for row in result["data"])
+
+    if seen is not None and uploaded:
+        seen.save()
+    if state is not None:
+        # 所有資料都已寫入後才記錄 ETag，失敗的 feed 下次會重新抓取
+        store_feed_validators(state, report, failed_sources)
+    logging.info(f"Pipeline finished: {uploaded} uploaded, {failed} failed.")
+    return {"uploaded": uploaded, "failed": failed, "articles": collected}
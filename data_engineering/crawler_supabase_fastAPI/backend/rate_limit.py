@@ -0,0 +1,63 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Every request takes one token; tokens refill at
+    `rate_per_minute`, so concurrent workers together never exceed the quota.
+    """
+
+    def __init__(self, rate_per_minute, capacity=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Block until a token is available and take it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for `seconds` (e.g. after a 429), for every worker.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+def backoff_delay(attempt, retry_after=None, base=2.0, cap=60.0):
+    """
+    Exponential backoff with jitter for 429/5xx responses. A Retry-After
+    value sent by the server takes precedence.
+
+    Args:
+        attempt (int): 1-based attempt number.
+        retry_after (float, optional): Seconds requested by the server.
+
+    Returns:
+        float: Seconds to wait before the next attempt.
+    """
+    if retry_after:
+        return min(cap, retry_after)
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(1, 1.5)
@@ -1,67 +1,245 @@
-from supabase import create_client, Client
-from dotenv import load_dotenv
-import pandas as pd
-from sentence_transformers import SentenceTransformer
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import os
-
-# 加載環境變數
-load_dotenv()
-
-# 初始化 Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# 1. 取得所有 f1_news
-news_response = supabase.table("f1_news").select("id, title, content").execute()
-news_data = news_response.data
-df = pd.DataFrame(news_data)
-df["text"] = df["title"] + " " + df["content"]
-
-# 2. 取得 related_news 中已經計算過的 news_id
-related_response = supabase.table("related_news").select("news_id").execute()
-processed_ids = set([row["news_id"] for row in related_response.data])
-
-# 3. 找出還沒被處理過的新聞
-unprocessed_df = df[~df["id"].isin(processed_ids)].reset_index(drop=True)
-
-# 如果都處理過了就不做事
-if unprocessed_df.empty:
-    print("✅ 所有新聞都已經建立過相關新聞")
-else:
-    print(f"🔍 共 {len(unprocessed_df)} 筆新聞尚未建立相似度")
-
-    # 4. 全部做 embedding（因為要比較用）
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = model.encode(df["text"].tolist(), convert_to_tensor=True)
-    cosine_sim = cosine_similarity(embeddings.cpu())
-
-    related_news = []
-
-    # 5. 只針對未處理的新聞跑相似新聞
-    for i, row in unprocessed_df.iterrows():
-        current_id = row["id"]
-        df_index = df[df["id"] == current_id].index[0]  # 在原始 df 的位置
-        similarities = cosine_sim[df_index]
-        similar_indices = similarities.argsort()[::-1][1:6]  # 取前 5 個
-
-        for j in similar_indices:
-            score = float(similarities[j])
-            if score < 0.2:
-                continue
-            related_news.append(
-                {
-                    "news_id": str(current_id),
-                    "related_news_id": str(df.iloc[j]["id"]),
-                    "similarity_score": round(score, 4),
-                }
+from supabase_client import get_supabase
+from upload_to_supabase import notify_news_api, upload_to_supabase
+from embedding_store import EmbeddingStore
+from encoder import get_encoder
+from html_parser import html_to_text
+from similarity import top_k
+
+# Rows read per request when listing ids / reading article text
+CORPUS_PAGE_SIZE = 500
+# Articles whose text is fetched per request when encoding new articles
+FETCH_BATCH_SIZE = 100
+# The model only reads the first 256 tokens, longer text is cut before tokenizing
+EMBED_MAX_CHARS = 4000
+# Version of article_text; stores embedded from another text are rebuilt
+EMBED_TEXT_VERSION = 2
+# related_news rows per upsert request, and requests sent at the same time
+RELATED_CHUNK_SIZE = 500
+RELATED_UPLOAD_WORKERS = 4
+# New articles whose neighbours are searched at once
+QUERY_BATCH_SIZE = 1000
+RELATED_TOP_K = 5
+MIN_SIMILARITY = 0.2
+
+
+def iter_column(supabase, table_name, column, page_size=CORPUS_PAGE_SIZE):
+    """
+    逐頁讀取一個欄位的所有不重複值（以該欄位做 keyset 分頁），
+    不受 PostgREST 單次回傳筆數上限影響。
+
+    Yields:
+        str: 欄位值。
+    """
+    last = None
+    while True:
+        query = supabase.table(table_name).select(column)
+        if last is not None:
+            query = query.gt(column, last)
+        rows = query.order(column).limit(page_size).execute().data
+        for row in rows:
+            yield str(row[column])
+        if len(rows) < page_size:
+            return
+        last = rows[-1][column]
+
+
+def iter_articles(supabase, ids, page_size=FETCH_BATCH_SIZE):
+    """
+    依序讀取指定新聞的 id / title / content，每頁 `page_size` 筆，
+    一次只有一頁的 HTML 在記憶體中。
+
+    Yields:
+        list: 一頁 (id, 去掉 HTML 的文字) tuple。
+    """
+    for start in range(0, len(ids), page_size):
+        rows = (
+            supabase.table("f1_news")
+            .select("id, title, content")
+            .in_("id", ids[start : start + page_size])
+            .execute()
+            .data
+        )
+        if rows:
+            yield [(str(row["id"]), article_text(row)) for row in rows]
+
+
+def article_text(row):
+    """
+    Text that is embedded for an article: its title and the visible text of
+    its content. Bump EMBED_TEXT_VERSION when this changes.
+    """
+    return f"{row.get('title') or ''} {html_to_text(row.get('content'))}"[:EMBED_MAX_CHARS]
+
+
+def encode_new_articles(supabase, store, ids, encoder):
+    """
+    把還沒有 embedding 的新聞編碼後加入 store，只抓取這些新聞的內容。
+
+    Args:
+        supabase (Client): Supabase 客戶端。
+        store (EmbeddingStore): Embedding store。
+        ids (list): 目前 f1_news 的所有 id。
+        encoder (Encoder): 編碼器，模型在第一次編碼時才載入。
+
+    Returns:
+        int: 新增的 embedding 數量。
+    """
+    missing = store.missing(ids)
+    if not missing:
+        return 0
+    print(f"🧮 共 {len(missing)} 筆新聞需要計算 embedding")
+    added = 0
+    # 每頁讀取後立即編碼寫入 store，記憶體用量與新聞總數無關
+    for page in iter_articles(supabase, missing):
+        page_ids, texts = zip(*page)
+        vectors = encoder.encode(list(texts))
+        added += store.add(list(page_ids), vectors)
+    return added
+
+
+def build_related_news(encoder=None):
+    """
+    為尚未處理過的新聞計算相似新聞，並寫入 related_news。
+
+    Args:
+        encoder (Encoder, optional): 編碼器，預設使用共用的 get_encoder()。
+    """
+    encoder = encoder or get_encoder()
+    supabase = get_supabase()
+    store = EmbeddingStore(
+        model=encoder.model_name,
+        backend=encoder.backend,
+        text_version=EMBED_TEXT_VERSION,
+    )
+
+    # 1. 取得所有 f1_news 的 id（內容只在需要編碼時才抓）
+    news_ids = list(iter_column(supabase, "f1_news", "id"))
+    if not news_ids:
+        return
+
+    # 2. 取得 related_news 中已經計算過的 news_id
+    processed_ids = set(iter_column(supabase, "related_news", "news_id"))
+
+    # 3. 找出還沒被處理過的新聞
+    unprocessed_ids = [id for id in news_ids if id not in processed_ids]
+
+    # 如果都處理過了就不做事
+    if not unprocessed_ids:
+        print("✅ 所有新聞都已經建立過相關新聞")
+        return
+
+    print(f"🔍 共 {len(unprocessed_ids)} 筆新聞尚未建立相似度")
+
+    # 4. 只對新文章做 embedding，其餘從 store 讀取
+    added = encode_new_articles(supabase, store, news_ids, encoder)
+    print(f"🧮 新增 {added} 筆 embedding，store 共 {len(store)} 筆")
+    unprocessed_ids = [id for id in unprocessed_ids if id in store]
+    corpus = store.matrix()
+    # 只比對目前還在 f1_news 裡的新聞
+    mask = np.zeros(len(corpus), dtype=bool)
+    mask[store.rows([id for id in news_ids if id in store])] = True
+
+    # 5. 只針對未處理的新聞找相似新聞，邊計算邊寫入
+    written, failed = write_related_news(store, corpus, unprocessed_ids, mask)
+    if written:
+        print(f"✅ 寫入 {written} 筆相關新聞資料")
+        notify_news_api("/news/")
+    elif not failed:
+        print("⚠️ 沒有找到符合條件的相似新聞")
+    if failed:
+        print(f"❌ {failed} 筆相關新聞寫入失敗，重新執行即可補上")
+
+
+def related_rows(store, news_id, indices, scores):
+    """
+    Rows of related_news for the top-k result of one article.
+    """
+    return [
+        {
+            "news_id": news_id,
+            "related_news_id": store.ids[j],
+            "similarity_score": round(float(score), 4),
+        }
+        for j, score in zip(indices, scores)
+        if j >= 0 and score >= MIN_SIMILARITY
+    ]
+
+
+def write_related_news(store, corpus, article_ids, mask=None):
+    """
+    找出每篇文章最相似的新聞並寫入 related_news。
+    相似度以 QUERY_BATCH_SIZE 篇為一批計算，每累積 RELATED_CHUNK_SIZE 筆就交給
+    thread pool upsert（on_conflict news_id, related_news_id，見
+    sql/005_related_news_unique.sql），寫入與下一批的計算同時進行。
+    同一篇文章的資料放在同一個請求中；寫入失敗的文章在下次執行時會重新計算，
+    因為有唯一鍵，重複寫入也不會產生重複資料。
+
+    Returns:
+        tuple: (寫入筆數, 失敗筆數)
+    """
+    futures = []
+    chunk = []
+    with ThreadPoolExecutor(max_workers=RELATED_UPLOAD_WORKERS) as executor:
+
+        def submit(rows):
+            futures.append(
+                executor.submit(
+                    upload_to_supabase,
+                    "related_news",
+                    rows,
+                    chunk_size=len(rows),
+                    on_conflict="news_id,related_news_id",
+                )
+            )
+
+        for start in range(0, len(article_ids), QUERY_BATCH_SIZE):
+            batch_ids = article_ids[start : start + QUERY_BATCH_SIZE]
+            query_rows = store.rows(batch_ids)
+            indices, scores = top_k(
+                corpus[query_rows], corpus, k=RELATED_TOP_K, exclude=query_rows, mask=mask
             )
+            for news_id, row_indices, row_scores in zip(batch_ids, indices, scores):
+                chunk.extend(related_rows(store, news_id, row_indices, row_scores))
+                if len(chunk) >= RELATED_CHUNK_SIZE:
+                    submit(chunk)
+                    chunk = []
+        if chunk:
+            submit(chunk)
+
+    written = failed = 0
+    for future in futures:
+        result = future.result()
+        written += len(result["data"])
+        failed += len(result["failed"])
+    return written, failed
+
 
-    # 6. 批次寫入
-    if related_news:
-        supabase.table("related_news").insert(related_news).execute()
-        print(f"✅ 寫入 {len(related_news)} 筆相關新聞資料")
+def run_forever(interval):
+    """
+    常駐模式：模型只載入一次，每 `interval` 秒為新文章建立相關新聞。
+    """
+    encoder = get_encoder()
+    while True:
+        try:
+            build_related_news(encoder)
+        except Exception as e:
+            logging.error(f"Related news run failed: {e}", exc_info=True)
+        stats = encoder.stats()
+        if stats["sentences"]:
+            logging.info(
+                f"Encoder: {stats['sentences']} texts, {stats['per_second']:.1f} texts/s"
+            )
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 2 and sys.argv[1] == "--watch":
+        run_forever(float(sys.argv[2]))
     else:
-        print("⚠️ 沒有找到符合條件的相似新聞")
+        build_related_news()
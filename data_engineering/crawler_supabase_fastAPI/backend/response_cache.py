@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Seconds a cached response is served before Supabase is queried again
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Responses kept in memory; the least recently used one is dropped above this
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+
+class CacheEntry:
+    def __init__(self, body, expires):
+        self.body = body
+        self.expires = expires
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialised JSON responses with a TTL. The news
+    only changes when the pipeline runs, so most requests are served from
+    memory; `invalidate` is called when the pipeline has written new data.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, payload):
+        body = json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        entry = CacheEntry(body, time.monotonic() + self.ttl)
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, prefix=None):
+        """
+        Drop every cached response, or only those whose key starts with `prefix`
+        (e.g. "/news/").
+
+        Returns:
+            int: Number of responses dropped.
+        """
+        with self._lock:
+            if prefix is None:
+                dropped = len(self.entries)
+                self.entries.clear()
+                return dropped
+            keys = [key for key in self.entries if key.startswith(prefix)]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+
+    def record(self, hit, seconds, not_modified=False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.hit_seconds += seconds
+            else:
+                self.misses += 1
+                self.miss_seconds += seconds
+            if not_modified:
+                self.not_modified += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit ratio, 304 count, entries and the mean latency of hits and
+                  misses in milliseconds.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "not_modified": self.not_modified,
+                "hit_latency_ms": round(self.hit_seconds / self.hits * 1000, 3)
+                if self.hits
+                else None,
+                "miss_latency_ms": round(self.miss_seconds / self.misses * 1000, 3)
+                if self.misses
+                else None,
+            }
+
+
+def cache_key(request: Request):
+    """
+    Route path plus the sorted query parameters.
+    """
+    params = sorted(request.query_params.multi_items())
+    return f"{request.url.path}?{'&'.join(f'{k}={v}' for k, v in params)}"
+
+
+def etag_matches(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+async def cached_response(request: Request, cache: ResponseCache, build):
+    """
+    Serve a JSON response from the cache, awaiting `build()` on a miss.
+    Sends an ETag and answers 304 Not Modified when the client already has it,
+    so browsers and CDNs can revalidate without downloading the body again.
+    """
+    start = time.perf_counter()
+    key = cache_key(request)
+    entry = cache.get(key)
+    hit = entry is not None
+    if not hit:
+        entry = cache.set(key, await build())
+
+    headers = {"ETag": entry.etag, "Cache-Control": "public, no-cache"}
+    not_modified = etag_matches(request, entry.etag)
+    if not_modified:
+        response = Response(status_code=304, headers=headers)
+    else:
+        response = Response(entry.body, media_type="application/json", headers=headers)
+    cache.record(hit, time.perf_counter() - start, not_modified)
+    return response
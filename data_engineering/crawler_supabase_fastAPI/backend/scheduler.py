@@ -0,0 +1,310 @@
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+from supabase_client import get_supabase
+from upload_to_supabase import SupabaseWriter
+from translate_news import TRANSLATE_WORKERS, ArticleTranslator
+from content_editor import edit_content_row
+from title_editor import edit_title_row
+
+# Rows a worker claims at once
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "5"))
+# Seconds a claim is valid; rows of a crashed worker are picked up again afterwards
+LEASE_SECONDS = int(os.getenv("LEASE_SECONDS", "900"))
+# Workers per edit stage (content / title)
+EDIT_WORKERS = int(os.getenv("EDIT_WORKERS", "2"))
+# Seconds to wait for upstream work when a queue is empty
+POLL_INTERVAL = 5.0
+# Consecutive failed claims before a worker gives up
+MAX_CLAIM_ERRORS = 3
+# Consecutive claims that lease none of the candidates before a worker gives up
+MAX_EMPTY_CLAIMS = 8
+
+
+class Stage:
+    """
+    One step of the translation pipeline. Its pending rows are selected by
+    the stage's status filters and claimed with a lease stored in
+    `<name>_lease_until` / `<name>_leased_by` (see sql/001_work_queue_leases.sql).
+
+    Args:
+        name (str): Stage name, also the prefix of the lease columns.
+        process (callable): Turns a claimed row into the row to upsert, or None.
+        filters (list): (method, column, value) filters selecting pending rows,
+            e.g. ("eq", "translation_status", "translated").
+        any_of (list, optional): PostgREST conditions of which at least one must hold.
+        workers (int): Number of worker threads.
+        upstream (tuple): Stages that produce this stage's rows; the stage keeps
+            polling until they are finished.
+    """
+
+    def __init__(self, name, process, filters=(), any_of=None, workers=1, upstream=()):
+        self.name = name
+        self.process = process
+        self.filters = list(filters)
+        self.any_of = any_of
+        self.workers = workers
+        self.upstream = upstream
+        self.lease_column = f"{name}_lease_until"
+        self.owner_column = f"{name}_leased_by"
+        self.done = threading.Event()
+
+    def pending(self, query, now):
+        """
+        Restrict a query to the rows of this stage that are not leased.
+        """
+        for method, column, value in self.filters:
+            query = getattr(query, method)(column, value)
+        lease_free = f'{self.lease_column}.is.null,{self.lease_column}.lt."{now}"'
+        if self.any_of:
+            return query.or_(
+                ",".join(
+                    f"and({condition},or({lease_free}))" for condition in self.any_of
+                )
+            )
+        return query.or_(lease_free)
+
+
+def default_stages(translator, translate_workers=TRANSLATE_WORKERS, edit_workers=EDIT_WORKERS):
+    """
+    translate → content edit / title edit. Both edit stages start on an article
+    as soon as its translation has been written.
+    """
+    return [
+        Stage(
+            "translate",
+            translator.translate_row,
+            any_of=["title_zh.is.null", "content_zh.is.null"],
+            workers=translate_workers,
+        ),
+        Stage(
+            "content",
+            edit_content_row,
+            filters=[
+                ("eq", "translation_status", "translated"),
+                ("is_", "content_status", "null"),
+            ],
+            workers=edit_workers,
+            upstream=("translate",),
+        ),
+        Stage(
+            "title",
+            edit_title_row,
+            filters=[
+                ("eq", "translation_status", "translated"),
+                ("is_", "title_status", "null"),
+            ],
+            workers=edit_workers,
+            upstream=("translate",),
+        ),
+    ]
+
+
+def claim(stage, worker_id, batch_size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS, table_name="f1_news"):
+    """
+    Claim up to `batch_size` pending rows of a stage. Candidates are selected
+    first and then leased with a conditional UPDATE that repeats the stage
+    filters, so a row is only ever handed to one worker.
+
+    Returns:
+        tuple: (claimed rows, number of candidates seen). Fewer claimed rows than
+               candidates means another worker won part of the batch.
+    """
+    client = get_supabase()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    candidates = (
+        stage.pending(client.table(table_name).select("id"), now.isoformat())
+        .order("id")
+        .limit(batch_size)
+        .execute()
+        .data
+    )
+    if not candidates:
+        return [], 0
+
+    lease_until = now + datetime.timedelta(seconds=lease_seconds)
+    claimed = (
+        stage.pending(
+            client.table(table_name)
+            .update(
+                {
+                    stage.lease_column: lease_until.isoformat(),
+                    stage.owner_column: worker_id,
+                }
+            )
+            .in_("id", [row["id"] for row in candidates]),
+            now.isoformat(),
+        )
+        .execute()
+        .data
+    )
+    return claimed, len(candidates)
+
+
+def check_lease_columns(stages, table_name="f1_news"):
+    """
+    Fail early when sql/001_work_queue_leases.sql has not been applied.
+    """
+    columns = ",".join(
+        f"{stage.lease_column},{stage.owner_column}" for stage in stages
+    )
+    get_supabase().table(table_name).select(columns).limit(1).execute()
+
+
+def run_worker(stage, stages, worker_id, writer, batch_size, lease_seconds, poll_interval):
+    """
+    Claim → process → write loop of one worker. Returns the number of rows
+    processed once the queue is empty and every upstream stage is finished.
+    """
+    upstream = [stages[name] for name in stage.upstream]
+    processed = 0
+    errors = 0
+    misses = 0
+    while True:
+        # 先讀 upstream 狀態再領取，避免漏掉 upstream 最後寫入的資料
+        upstream_done = all(s.done.is_set() for s in upstream)
+        try:
+            rows, candidates = claim(stage, worker_id, batch_size, lease_seconds)
+            errors = 0
+        except Exception as e:
+            errors += 1
+            logging.error(f"[{worker_id}] Claim failed: {e}", exc_info=True)
+            if errors >= MAX_CLAIM_ERRORS:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        if not rows:
+            if candidates:
+                # 通常是被其他 worker 搶先領走；一直領不到則多半是 key 沒有
+                # UPDATE 權限 (RLS) 或 lease 條件不成立，退避後重試，最後放棄
+                misses += 1
+                if misses >= MAX_EMPTY_CLAIMS:
+                    logging.error(
+                        f"[{worker_id}] {candidates} candidates but none could be leased "
+                        f"{misses} times in a row, giving up (check UPDATE access to the table)."
+                    )
+                    break
+                time.sleep(min(poll_interval, 0.1 * 2**misses))
+                continue
+            misses = 0
+            if upstream_done:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        misses = 0
+        for row in rows:
+            item = stage.process(row)
+            if item is None:
+                # 保留 lease，等過期後（下一次執行）再重試，避免同一筆一直失敗
+                logging.warning(f"[{worker_id}] Row {row.get('id')} failed, left leased.")
+                continue
+            item[stage.lease_column] = None
+            item[stage.owner_column] = None
+            writer.add(item)
+            processed += 1
+        # 每批立即寫入，下游 stage 才能馬上領取
+        writer.flush()
+    logging.info(f"[{worker_id}] finished, {processed} rows processed.")
+    return processed
+
+
+def run_scheduler(
+    stages=None,
+    batch_size=CLAIM_BATCH_SIZE,
+    lease_seconds=LEASE_SECONDS,
+    poll_interval=POLL_INTERVAL,
+    table_name="f1_news",
+):
+    """
+    Run the translate / content edit / title edit stages concurrently on the
+    status-column work queue. Several processes can run it at the same time;
+    leases keep them from working on the same row.
+
+    Args:
+        stages (list, optional): Stages to run, defaults to `default_stages`.
+        batch_size (int): Rows claimed at once by a worker.
+        lease_seconds (int): Lease duration.
+        poll_interval (float): Seconds between polls of an empty queue.
+        table_name (str): Supabase table.
+
+    Returns:
+        dict: stage name -> {'processed', 'uploaded', 'failed'} counts.
+    """
+    translator = None
+    if stages is None:
+        translator = ArticleTranslator()
+        stages = default_stages(translator)
+    by_name = {stage.name: stage for stage in stages}
+    check_lease_columns(stages, table_name)
+
+    host = f"{socket.gethostname()}-{os.getpid()}"
+    report = {}
+
+    def run_stage(stage):
+        # 無論成功與否都標記完成，否則等待 upstream 的下游 stage 會一直輪詢
+        try:
+            run_stage_workers(stage)
+        finally:
+            stage.done.set()
+
+    def run_stage_workers(stage):
+        writer = SupabaseWriter(table_name, updated=True)
+        counts = []
+
+        def work(n):
+            counts.append(
+                run_worker(
+                    stage,
+                    by_name,
+                    f"{host}-{stage.name}-{n}",
+                    writer,
+                    batch_size,
+                    lease_seconds,
+                    poll_interval,
+                )
+            )
+
+        workers = [
+            threading.Thread(target=work, args=(n,), name=f"{stage.name}-{n}")
+            for n in range(max(1, stage.workers))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        results = writer.close()
+        report[stage.name] = {
+            "processed": sum(counts),
+            "uploaded": len(results["data"]),
+            "failed": len(results["failed"]),
+        }
+
+    runners = [
+        threading.Thread(target=run_stage, args=(stage,), name=f"stage-{stage.name}")
+        for stage in stages
+    ]
+    try:
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+    finally:
+        if translator is not None:
+            translator.close()
+
+    for name, counts in report.items():
+        logging.info(
+            f"Stage {name}: {counts['processed']} processed, "
+            f"{counts['uploaded']} uploaded, {counts['failed']} failed."
+        )
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_scheduler()
@@ -0,0 +1,93 @@
+import datetime
+import json
+import logging
+import os
+
+# Local copy of the links that are already stored in Supabase
+SEEN_LINKS_PATH = os.getenv("SEEN_LINKS_PATH", "data/seen_links.json")
+PREFETCH_PAGE_SIZE = 1000
+
+
+class SeenLinkIndex:
+    """
+    Set of article links that are already ingested. The crawler checks it
+    before downloading an article so re-runs and overlapping fetch windows
+    cost no network or parsing work.
+
+    The index is loaded from a local JSON file and can be topped up with the
+    links stored in Supabase (`prefetch`), which is the source of truth.
+    """
+
+    def __init__(self, path=SEEN_LINKS_PATH):
+        self.path = path
+        self.links = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.links = set(json.load(f))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not read seen links from {path}: {e}")
+
+    def __contains__(self, link):
+        return link in self.links
+
+    def __len__(self):
+        return len(self.links)
+
+    def add(self, links):
+        self.links.update(link for link in links if link)
+
+    def prefetch(self, client, table_name="f1_news", days=None):
+        """
+        Load the links already stored in Supabase.
+
+        Args:
+            client (supabase.Client): Supabase client.
+            table_name (str): News table name.
+            days (int, optional): Only load rows created in the past `days` days.
+                Loads the whole table when omitted.
+
+        Returns:
+            int: Number of links loaded.
+        """
+        since = None
+        if days is not None:
+            since = (
+                datetime.datetime.now(datetime.timezone.utc)
+                - datetime.timedelta(days)
+            ).isoformat()
+
+        loaded = 0
+        start = 0
+        try:
+            while True:
+                query = client.table(table_name).select("link")
+                if since:
+                    query = query.gte("created_at", since)
+                rows = (
+                    query.order("link")
+                    .range(start, start + PREFETCH_PAGE_SIZE - 1)
+                    .execute()
+                    .data
+                )
+                self.add(row["link"] for row in rows)
+                loaded += len(rows)
+                if len(rows) < PREFETCH_PAGE_SIZE:
+                    break
+                start += PREFETCH_PAGE_SIZE
+        except Exception as e:
+            logging.warning(f"Could not prefetch links from {table_name}: {e}")
+        logging.info(f"Loaded {loaded} known links from {table_name}.")
+        return loaded
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(self.links), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        logging.info(f"Seen links saved to {self.path}")
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+
+# Corpus rows multiplied with the queries at once; memory is queries × block
+SIMILARITY_BLOCK_ROWS = int(os.getenv("SIMILARITY_BLOCK_ROWS", "8192"))
+# Queries scored together
+QUERY_BLOCK_ROWS = 256
+
+
+def normalize(vectors):
+    """
+    L2-normalise the rows of a matrix, so a dot product is the cosine similarity.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(queries, corpus, k=5, exclude=None, mask=None, block_rows=SIMILARITY_BLOCK_ROWS):
+    """
+    The `k` most similar corpus rows of every query, by dot product of
+    normalised vectors (cosine similarity).
+
+    The corpus is scanned in blocks of `block_rows`, and only the query rows are
+    multiplied with it. A running top-k is kept per query with
+    `np.argpartition`, so no N × N matrix is built and no row is fully sorted.
+    `corpus` can be a memory map (EmbeddingStore.matrix); each block is read
+    only once per batch of queries.
+
+    Args:
+        queries (np.ndarray): Normalised query vectors, shape (m, dim).
+        corpus (np.ndarray): Normalised corpus vectors, shape (n, dim).
+        k (int): Neighbours per query.
+        exclude (array-like, optional): Corpus row of every query itself, which
+            is never returned as its own neighbour.
+        mask (np.ndarray, optional): Boolean vector over the corpus rows; rows
+            set to False are skipped (e.g. deleted articles).
+        block_rows (int): Corpus rows scored at once.
+
+    Returns:
+        tuple: (indices, scores), both shape (m, k), most similar first.
+               Missing neighbours (corpus smaller than k) have index -1 and
+               score -inf.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    m = len(queries)
+    n = len(corpus)
+    exclude = None if exclude is None else np.asarray(exclude, dtype=np.int64)
+    best_idx = np.full((m, k), -1, dtype=np.int64)
+    best_scores = np.full((m, k), -np.inf, dtype=np.float32)
+    if m == 0 or n == 0 or k <= 0:
+        return best_idx, best_scores
+
+    for q_start in range(0, m, QUERY_BLOCK_ROWS):
+        q_end = min(q_start + QUERY_BLOCK_ROWS, m)
+        q = queries[q_start:q_end]
+        idx = best_idx[q_start:q_end]
+        scores = best_scores[q_start:q_end]
+        for c_start in range(0, n, block_rows):
+            c_end = min(c_start + block_rows, n)
+            block_scores = q @ np.asarray(corpus[c_start:c_end], dtype=np.float32).T
+            if mask is not None:
+                block_scores[:, ~mask[c_start:c_end]] = -np.inf
+            if exclude is not None:
+                own = exclude[q_start:q_end]
+                hit = (own >= c_start) & (own < c_end)
+                block_scores[np.nonzero(hit)[0], own[hit] - c_start] = -np.inf
+
+            # 合併目前的 top-k 與這個 block，再用 argpartition 取出新的 top-k
+            merged_scores = np.concatenate([scores, block_scores], axis=1)
+            merged_idx = np.concatenate(
+                [idx, np.broadcast_to(np.arange(c_start, c_end), block_scores.shape)], axis=1
+            )
+            if merged_scores.shape[1] > k:
+                part = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(merged_scores, part, axis=1)
+                idx = np.take_along_axis(merged_idx, part, axis=1)
+            else:
+                scores, idx = merged_scores, merged_idx
+
+        order = np.argsort(-scores, axis=1, kind="stable")
+        scores = np.take_along_axis(scores, order, axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        idx[np.isneginf(scores)] = -1
+        best_idx[q_start:q_end] = idx
+        best_scores[q_start:q_end] = scores
+    return best_idx, best_scores
@@ -0,0 +1,24 @@
+-- Lease columns used by scheduler.py to treat the status columns of f1_news
+-- as a work queue. A worker claims a row by setting <stage>_lease_until in a
+-- conditional UPDATE; an expired lease can be claimed again by another worker.
+
+alter table f1_news
+    add column if not exists translate_lease_until timestamptz,
+    add column if not exists translate_leased_by text,
+    add column if not exists content_lease_until timestamptz,
+    add column if not exists content_leased_by text,
+    add column if not exists title_lease_until timestamptz,
+    add column if not exists title_leased_by text;
+
+-- Candidate lookups of each stage
+create index if not exists f1_news_translate_queue_idx
+    on f1_news (id)
+    where title_zh is null or content_zh is null;
+
+create index if not exists f1_news_content_queue_idx
+    on f1_news (id)
+    where translation_status = 'translated' and content_status is null;
+
+create index if not exists f1_news_title_queue_idx
+    on f1_news (id)
+    where translation_status = 'translated' and title_status is null;
@@ -0,0 +1,51 @@
+-- Cached counters read by web.py instead of counting f1_news on every request.
+-- translated_count is kept up to date by a trigger on every write.
+
+create table if not exists f1_news_stats (
+    name text primary key,
+    value bigint not null default 0
+);
+
+insert into f1_news_stats (name, value)
+select 'translated_count', count(*)
+from f1_news
+where translation_status = 'translated'
+on conflict (name) do update set value = excluded.value;
+
+-- security definer: f1_news_stats only has a SELECT policy, so with the
+-- caller's rights a write made with a non-service-role key would update 0 rows
+create or replace function f1_news_stats_refresh() returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    delta bigint := 0;
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.translation_status = 'translated' then
+        delta := delta - 1;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and new.translation_status = 'translated' then
+        delta := delta + 1;
+    end if;
+    if delta <> 0 then
+        update f1_news_stats set value = value + delta where name = 'translated_count';
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists f1_news_stats_trigger on f1_news;
+create trigger f1_news_stats_trigger
+after insert or update of translation_status or delete on f1_news
+for each row execute function f1_news_stats_refresh();
+
+-- The web API only reads f1_news_stats
+alter table f1_news_stats enable row level security;
+drop policy if exists "f1_news_stats are readable" on f1_news_stats;
+create policy "f1_news_stats are readable" on f1_news_stats for select using (true);
+
+-- Keyset pagination of /index: (published_at desc, id desc) over translated news
+create index if not exists f1_news_translated_published_idx
+    on f1_news (published_at desc, id desc)
+    where translation_status = 'translated';
@@ -0,0 +1,30 @@
+-- /news/{id} in one round trip: the article and up to 6 related articles,
+-- instead of article → related ids → related articles.
+
+create index if not exists related_news_news_id_idx on related_news (news_id);
+
+create or replace function news_detail(p_id uuid) returns json
+language sql stable as $$
+    select json_build_object(
+        'news', (
+            select to_json(n)
+            from (
+                select id, title_zh, link, author, content_zh, published_at
+                from f1_news
+                where id = p_id
+            ) n
+        ),
+        'related_news', coalesce((
+            select json_agg(r order by r.published_at desc)
+            from (
+                select f.id, f.title_zh, f.published_at, f.author, f.content_zh,
+                       f.image_url, f.source
+                from related_news rn
+                join f1_news f on f.id = rn.related_news_id
+                where rn.news_id = p_id
+                order by f.published_at desc
+                limit 6
+            ) r
+        ), '[]'::json)
+    );
+$$;
@@ -0,0 +1,51 @@
+-- Indexed search for /search, replacing the two ilike '%q%' scans over
+-- title / content.
+--   * search_vector: English title + text of content (english stemming) and
+--     title_zh + text of content_zh (simple), matched with websearch syntax.
+--   * trigram indexes on title_zh and the text of content_zh: Chinese has no
+--     word boundaries for tsvector, so substring matches use pg_trgm.
+-- search_news ranks in the database and returns only max_results rows.
+
+create extension if not exists pg_trgm;
+
+alter table f1_news add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(title_zh, '')), 'A') ||
+        setweight(to_tsvector('english',
+            regexp_replace(coalesce(content, ''), '<[^>]+>', ' ', 'g')), 'B') ||
+        setweight(to_tsvector('simple',
+            regexp_replace(coalesce(content_zh, ''), '<[^>]+>', ' ', 'g')), 'B')
+    ) stored;
+
+create index if not exists f1_news_search_vector_idx
+    on f1_news using gin (search_vector);
+create index if not exists f1_news_title_zh_trgm_idx
+    on f1_news using gin (title_zh gin_trgm_ops);
+create index if not exists f1_news_content_zh_trgm_idx
+    on f1_news using gin (
+        (regexp_replace(coalesce(content_zh, ''), '<[^>]+>', ' ', 'g')) gin_trgm_ops
+    );
+
+create or replace function search_news(q text, max_results int default 10)
+returns setof f1_news
+language sql stable as $$
+    with query as (
+        select
+            websearch_to_tsquery('english', q) || websearch_to_tsquery('simple', q) as ts,
+            '%' || replace(replace(replace(q, '\', '\\'), '%', '\%'), '_', '\_') || '%' as pattern
+    )
+    select f.*
+    from f1_news f, query
+    where f.translation_status = 'translated'
+      and (
+          f.search_vector @@ query.ts
+          or f.title_zh ilike query.pattern
+          or regexp_replace(coalesce(f.content_zh, ''), '<[^>]+>', ' ', 'g') ilike query.pattern
+      )
+    order by
+        ts_rank_cd(f.search_vector, query.ts)
+          + case when f.title_zh ilike query.pattern then 1.0 else 0 end desc,
+        f.published_at desc
+    limit least(greatest(max_results, 1), 50);
+$$;
@@ -0,0 +1,15 @@
+-- Conflict key of related_news, so related_news.py can upsert in chunks and be
+-- rerun after a partial failure without duplicating pairs.
+
+-- Keep one row of every (news_id, related_news_id) pair written by earlier reruns
+delete from related_news a
+using related_news b
+where a.news_id = b.news_id
+  and a.related_news_id = b.related_news_id
+  and a.ctid > b.ctid;
+
+create unique index if not exists related_news_pair_key
+    on related_news (news_id, related_news_id);
+
+-- The unique index also serves the news_id lookups of news_detail (003)
+drop index if exists related_news_news_id_idx;
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import threading
+from dotenv import load_dotenv
+from supabase import AsyncClient, Client, acreate_client, create_client
+
+# 加載環境變數
+load_dotenv()
+
+_client = None
+_client_lock = threading.Lock()
+_async_client = None
+_async_client_lock = None
+
+
+def _credentials():
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        raise ValueError(
+            "Please set SUPABASE_URL and SUPABASE_KEY environment variables."
+        )
+    return supabase_url, supabase_key
+
+
+def get_supabase() -> Client:
+    """
+    取得整個行程共用的 Supabase 客戶端，第一次使用時才建立。
+    所有模組共用同一個客戶端（與其連線池），import 模組時不會建立任何連線。
+    Returns:
+        Client: Supabase 客戶端。
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(*_credentials())
+    return _client
+
+
+async def get_async_supabase() -> AsyncClient:
+    """
+    取得非同步的 Supabase 客戶端，供 web.py 的 async endpoint 使用，
+    查詢時不會佔用 FastAPI 的 threadpool。
+    客戶端綁定在第一次呼叫它的 event loop 上，之後共用同一個連線池。
+    Returns:
+        AsyncClient: 非同步 Supabase 客戶端。
+    """
+    global _async_client, _async_client_lock
+    if _async_client is None:
+        if _async_client_lock is None:
+            _async_client_lock = asyncio.Lock()
+        async with _async_client_lock:
+            if _async_client is None:
+                _async_client = await acreate_client(*_credentials())
+    return _async_client
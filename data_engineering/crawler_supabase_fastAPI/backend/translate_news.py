@@ -1,198 +1,375 @@
-import requests
 import os
 import json
 from dotenv import load_dotenv
-import time
 import logging
-import random
-from supabase import create_client, Client
-from requests.exceptions import Timeout
 import datetime
-from upload_to_supabase import upload_to_supabase
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from llm_client import get_llm_client
+from upload_to_supabase import SupabaseWriter
+from supabase_client import get_supabase
+from html_parser import split_blocks
+from translation_cache import TranslationCache, segment_key
+from chunking import CHUNK_WORKERS, chunk_segments
 
 load_dotenv()
 
-# Init Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-REQUESTS_PER_MINUTE = 5
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Number of articles translated concurrently; the rate limiter keeps them within quota
+TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", "3"))
+# 翻譯時一併做 content_editor 的編輯工作，每篇文章只需要一個請求
+EDIT_IN_TRANSLATION = os.getenv("EDIT_IN_TRANSLATION", "false").lower() == "true"
+
+# 分段翻譯時的結構化輸出格式：每個未快取的段落對應一個翻譯（keep 只在編輯模式使用）
+ARTICLE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title_zh": {"type": "STRING"},
+        "segments_zh": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "keep": {"type": "ARRAY", "items": {"type": "BOOLEAN"}},
+    },
+    "required": ["segments_zh"],
+}
+
+# Columns a translation worker needs
+TRANSLATE_COLUMNS = (
+    "id,link, title, title_zh, content, content_zh, translation_status, title_status, content_status"
+)
 
 logging.basicConfig(level=logging.INFO)
 
+TITLE_PROMPT = (
+    "You are a professional translator specializing in translating English F1 news articles into fluent Traditional Chinese.\n\n"
+    "Please translate the following news title into natural and fluent Traditional Chinese.\n\n"
+    "Remove all original HTML tags and structure (e.g., <p>...</p>, <h1>, etc.).\n\n"
+    "Keep all brand names and personal names (such as Apple, Nike, Elon Musk, Formula 1, Stefano Domenicali) in English without translation.\n\n"
+    "Do not add any explanations, interpretations, or additional comments.\n\n"
+    "Strictly follow the output format below:\n\n"
+    "Result: <Translated Title in Traditional Chinese>\n\n"
+    "Example:\n\n"
+    "Input:\n"
+    'Verstappen "not very confident" of keeping Piastri behind in F1 Saudi GP. ```html <h1>Why Verstappen feels Red Bull cannot put its woes down to just old wind tunnel</h1> <p>Max Verstappen believes that Red Bull\'\s</p>\n\n'
+    "Output:\n"
+    "Result: Verstappen「不太有信心」能在 F1 沙烏地大獎賽中將 Piastri 擋在身後。\n\n"
+    "Now, here is the title to translate:\n\n{text}"
+)
 
-def translate_text(combined_text, prompt_template):
-    prompt = prompt_template.format(text=combined_text)
-    try:
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}",
-            headers={"Content-Type": "application/json"},
-            json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
-            timeout=120,
+# 內容以段落（HTML block）為單位翻譯，只送出快取中沒有的段落，回傳 JSON（ARTICLE_SCHEMA）
+ARTICLE_PROMPT = (
+    "You are a professional translator specializing in translating English F1 news articles into fluent Traditional Chinese.\n\n"
+    "You will receive a JSON object with segments, a list of consecutive HTML blocks from a news article, and optionally its title.\n\n"
+    "Translate every segment into natural and fluent Traditional Chinese, preserving all original HTML tags and structure (e.g., <p>...</p>, <h3>, <blockquote>, etc.). Return them as segments_zh, exactly one translation per segment and in the same order.\n\n"
+    "If a title is given, translate it into natural and fluent Traditional Chinese as plain text, removing all HTML tags, and return it as title_zh.\n\n"
+    "Keep all brand names and personal names (such as Apple, Nike, Elon Musk, Formula 1, Stefano Domenicali) in English without translation.\n\n"
+    "Do not add any explanations, interpretations, or additional comments.\n\n"
+)
+# 同時完成 content_editor 的編輯工作：由 keep 標記每個段落是否保留
+ARTICLE_EDIT_PROMPT = ARTICLE_PROMPT + (
+    "Also judge every segment like an experienced F1 news editor and return keep, one boolean per segment in the same order:\n\n"
+    "true for meaningful paragraphs, comments, driver statements, race highlights, and other relevant content.\n\n"
+    "false for duplicates, advertisements, embedded videos, meaningless <script> tags, social sharing links, newsletter sign-up prompts, birthday greetings, historical trivia, and any unnecessary sections.\n\n"
+)
+ARTICLE_PROMPT += "Here is the article:\n\n{text}"
+ARTICLE_EDIT_PROMPT += "Here is the article:\n\n{text}"
+
+
+class ArticleTranslator:
+    """
+    Translates one article (row) at a time. Shared by fetch_and_translate_column
+    and the scheduler workers; safe to call from several threads.
+    """
+
+    def __init__(self, cache=None, edit=EDIT_IN_TRANSLATION, chunk_workers=CHUNK_WORKERS):
+        self.own_cache = cache is None
+        self.cache = TranslationCache() if cache is None else cache
+        self.edit = edit
+        self.llm = get_llm_client()
+        self.llm_mark = self.llm.mark()
+        # 長文章的 chunk 由所有文章共用的 thread pool 同時翻譯
+        self.chunk_executor = ThreadPoolExecutor(max_workers=max(1, chunk_workers))
+        # 翻譯中的段落 (segment key -> Future)，其他 worker 遇到相同段落時等待結果
+        self.in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def try_translate(self, text, translation_prompt, response_schema=None, validate=None):
+        """
+        Translate through the shared LLM client (rate limit, retries, timeout).
+        Structured answers are returned as a dict once `validate` accepts them.
+        """
+        prompt = translation_prompt.format(text=text)
+        if response_schema is None:
+            return self.llm.complete(prompt)
+        return self.llm.complete(
+            prompt,
+            parse=lambda fields: (fields if validate is None or validate(fields) else None),
+            response_schema=response_schema,
         )
-        if response.status_code == 200:
-            response_data = response.json()
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                return response_data["candidates"][0]["content"]["parts"][0]["text"]
-            else:
-                logging.error(
-                    f"Unexpected response format: {response_data}", exc_info=True
-                )
-                return None
+
+    def claim_segments(self, missing):
+        """
+        Split the missing segments into the ones this call translates and the
+        ones another worker is already translating.
+
+        Args:
+            missing (dict): segment key -> segment.
+
+        Returns:
+            tuple: (claims, waiting), both segment key -> Future. The claimed
+                   futures are resolved by `release_segments`.
+        """
+        claims = {}
+        waiting = {}
+        with self._in_flight_lock:
+            for key in missing:
+                future = self.in_flight.get(key)
+                if future is None:
+                    claims[key] = self.in_flight[key] = Future()
+                else:
+                    waiting[key] = future
+        return claims, waiting
+
+    def release_segments(self, claims, chunk, fields):
+        """
+        Hand the translations of a finished chunk (fields None when it failed)
+        to the workers waiting for its claimed segments.
+        """
+        if fields:
+            keep = fields["keep"] if self.edit else [None] * len(chunk)
+            results = dict(zip(map(segment_key, chunk), zip(fields["segments_zh"], keep)))
         else:
-            logging.error(
-                f"Translation failed with status code {response.status_code}: {response.text}",
-                exc_info=True,
+            results = {}
+        released = []
+        with self._in_flight_lock:
+            for segment in chunk:
+                key = segment_key(segment)
+                future = claims.get(key)
+                if future is not None and self.in_flight.get(key) is future:
+                    del self.in_flight[key]
+                    released.append((key, future))
+        for key, future in released:
+            future.set_result(results.get(key))
+
+    def translate_content(self, title, content):
+        """
+        Translate the content segment by segment. Cached segments are reused,
+        segments another worker is translating are awaited, and the others
+        (and the title, if given) are sent in a single request.
+
+        Returns:
+            tuple: (title_zh or None, content_zh or None, content_status or None)
+        """
+        edit = self.edit
+        cache = self.cache
+        segments = split_blocks(content)
+        found = cache.lookup(segments, need_keep=edit)
+        # 同一篇文章中重複的段落只送一次
+        missing = {
+            segment_key(segment): segment
+            for segment in segments
+            if segment_key(segment) not in found
+        }
+        # 其他文章正在翻譯的段落（共用的 boilerplate）不重複送出，等待它們的結果
+        claims, waiting = self.claim_segments(missing)
+
+        def translate_chunk(chunk, chunk_title):
+            fields = None
+            try:
+                request = {"segments": chunk}
+                if chunk_title:
+                    request["title"] = chunk_title
+                fields = self.try_translate(
+                    json.dumps(request, ensure_ascii=False),
+                    ARTICLE_EDIT_PROMPT if edit else ARTICLE_PROMPT,
+                    response_schema=ARTICLE_SCHEMA,
+                    validate=lambda fields: (
+                        len(fields.get("segments_zh") or []) == len(chunk)
+                        and (not edit or len(fields.get("keep") or []) == len(chunk))
+                        and (not chunk_title or bool(fields.get("title_zh")))
+                    ),
+                )
+                if fields:
+                    keep = fields["keep"] if edit else [None] * len(chunk)
+                    # 每個完成的 chunk 立即寫入快取，其他 chunk 失敗時下次只需重送失敗的部分
+                    cache.store(list(zip(chunk, fields["segments_zh"], keep)))
+                return fields
+            finally:
+                # 失敗時也要通知等待中的 worker，讓它們自己重送
+                self.release_segments(claims, chunk, fields)
+
+        def translate_chunks(pending, chunk_title):
+            # 長文章依 token 預算在 HTML block 邊界切成多個 chunk 同時翻譯，標題跟著第一個 chunk
+            chunks = chunk_segments(pending)
+            futures = [
+                self.chunk_executor.submit(translate_chunk, chunk, chunk_title if n == 0 else None)
+                for n, chunk in enumerate(chunks)
+            ]
+            translated_title = None
+            for n, (chunk, future) in enumerate(zip(chunks, futures)):
+                fields = future.result()
+                if not fields:
+                    return False, None
+                keep = fields["keep"] if edit else [None] * len(chunk)
+                for segment, translation, kept in zip(chunk, fields["segments_zh"], keep):
+                    found[segment_key(segment)] = (translation, kept)
+                if n == 0:
+                    translated_title = fields.get("title_zh")
+            return True, translated_title
+
+        try:
+            ok, translated_title = translate_chunks(
+                [segment for key, segment in missing.items() if key in claims], title
             )
+        except BaseException:
+            # chunk 沒送出時不能讓等待中的 worker 一直等
+            self.release_segments(claims, list(missing.values()), None)
+            raise
+        if not ok:
+            return None, None, None
+
+        failed = []
+        for key, future in waiting.items():
+            result = future.result()
+            if result is None:
+                failed.append(missing[key])
+            else:
+                found[key] = result
+        # 由其他文章的請求翻譯完成的段落一樣沒有送出，算作快取命中
+        cache.count_shared(
+            [
+                segment
+                for segment in segments
+                if segment_key(segment) in waiting and segment_key(segment) in found
+            ]
+        )
+        if failed and not translate_chunks(failed, None)[0]:
+            return None, None, None
+
+        translations = [found[segment_key(segment)] for segment in segments]
+        translated_content = "".join(translation for translation, _ in translations)
+        if not edit:
+            return translated_title, translated_content, None
+        kept = "".join(translation for translation, keep in translations if keep)
+        # 沒有任何值得保留的段落時沿用完整翻譯，與 content_editor 的 skilled 相同
+        if not kept:
+            return translated_title, translated_content, "skilled"
+        return translated_title, kept, "edited"
+
+    def translate_row(self, row):
+        """
+        Translate the missing title / content of a row.
+
+        Returns:
+            dict: The row to upsert, None when processing raised.
+        """
+        id = row["id"]
+        title, title_zh = row.get("title"), row.get("title_zh")
+        content, content_zh = row.get("content"), row.get("content_zh")
+
+        translated_title = title_zh
+        translated_content = content_zh
+        logging.info(
+            "---------------------------------------------------------------------------------------"
+        )
+        logging.info(f"Translating title: {title}")
+        # 每一列都帶相同欄位，批次 upsert 時才不會把其他列的欄位寫成 NULL
+        title_status = row.get("title_status")
+        content_status = row.get("content_status")
+        try:
+            if not content_zh and content:
+                structured_title, translated_content, edited_status = (
+                    self.translate_content(title if not title_zh else None, content)
+                )
+                if structured_title:
+                    translated_title = structured_title
+                    # 結構化輸出的標題已是純文字，不需要再經過 title_edit
+                    title_status = "edited"
+                if edited_status:
+                    content_status = edited_status
+            if not translated_title and title:
+                translated_title = self.try_translate(title, TITLE_PROMPT)
+
+            if translated_title and translated_content:
+                status = "translated"
+            elif translated_title == "null":
+                status = "title failed"
+            elif translated_content == "null":
+                status = "content failed"
+            else:
+                status = "All failed"
+
+            item = {
+                "id": id,
+                "title": title,
+                "title_zh": translated_title or "null",
+                "content": content,
+                "content_zh": translated_content or "null",
+                "translation_status": status,
+                "title_status": title_status,
+                "content_status": content_status,
+                "link": row.get("link"),
+            }
+            logging.info(f"✅ Title '{title}' processed. Status: {status}")
+            return item
+
+        except Exception as e:
+            logging.error(f"Error processing row {id}: {e}", exc_info=True)
             return None
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request failed with error: {e}", exc_info=True)
-        return None
 
+    def close(self):
+        self.chunk_executor.shutdown()
+        self.cache.log_stats()
+        self.llm.log_stats("Translation", since=self.llm_mark)
+        if self.own_cache:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
 
-def fetch_and_translate_column(cleaning_data, output_dir, debug=False):
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def fetch_and_translate_column(
+    cleaning_data,
+    output_dir,
+    debug=False,
+    workers=TRANSLATE_WORKERS,
+    edit=EDIT_IN_TRANSLATION,
+    cache=None,
+):
     try:
         if debug:
             data = cleaning_data
+            for i, row in enumerate(data):
+                row.setdefault("id", f"debug_{i}")
         else:
             response = (
-                supabase.table("f1_news")
-                .select(
-                    "id,link, title, title_zh, content, content_zh, translation_status"
-                )
+                get_supabase()
+                .table("f1_news")
+                .select(TRANSLATE_COLUMNS)
                 .or_("title_zh.is.null,content_zh.is.null")
                 .execute()
             )
             data = response.data
-        result = []
-
-        def try_translate(text, translation_prompt, retries=3):
-            for attempt in range(1, retries + 1):
-                try:
-                    translated = translate_text(text, translation_prompt)
-                    if translated and "Result:" in translated:
-                        return translated.split("Result:", 1)[1].strip()
-                    logging.warning(
-                        f"Translation attempt {attempt} failed. Retrying..."
-                    )
-                except Timeout:
-                    if attempt == retries:
-                        logging.warning(
-                            f"Translation timeout on attempt {attempt}. Skipping for now."
-                        )
-                        break
-                    else:
-                        logging.warning(
-                            f"Translation timeout on attempt {attempt}. Retrying..."
-                        )
-                except Exception as e:
-                    logging.warning(f"Unexpected error on attempt {attempt}: {e}")
-                time.sleep(random.uniform(3, 5))
-            return None
-
-        prompt1 = (
-            "You are a professional translator specializing in translating English F1 news articles into fluent Traditional Chinese.\n\n"
-            "Please translate the following news title into natural and fluent Traditional Chinese.\n\n"
-            "Remove all original HTML tags and structure (e.g., <p>...</p>, <h1>, etc.).\n\n"
-            "Keep all brand names and personal names (such as Apple, Nike, Elon Musk, Formula 1, Stefano Domenicali) in English without translation.\n\n"
-            "Do not add any explanations, interpretations, or additional comments.\n\n"
-            "Strictly follow the output format below:\n\n"
-            "Result: <Translated Title in Traditional Chinese>\n\n"
-            "Example:\n\n"
-            "Input:\n"
-            'Verstappen "not very confident" of keeping Piastri behind in F1 Saudi GP. ```html <h1>Why Verstappen feels Red Bull cannot put its woes down to just old wind tunnel</h1> <p>Max Verstappen believes that Red Bull\'\s</p>\n\n'
-            "Output:\n"
-            "Result: Verstappen「不太有信心」能在 F1 沙烏地大獎賽中將 Piastri 擋在身後。\n\n"
-            "Now, here is the title to translate:\n\n{text}"
-        )
+        # 結果會累積後批次 upsert，而不是每篇文章一個請求
+        writer = None if debug else SupabaseWriter("f1_news", updated=True)
 
-        prompt2 = (
-            "You are a professional translator specializing in translating English F1 news articles into fluent Traditional Chinese.\n\n"
-            "Please translate the following news article into natural and fluent Traditional Chinese.\n\n"
-            "Preserve all original HTML tags and structure (e.g., <p>...</p>, <h1>, etc.).\n\n"
-            "Keep all brand names and personal names (such as Apple, Nike, Elon Musk, Formula 1, Stefano Domenicali) in English without translation.\n\n"
-            "Do not add any explanations, interpretations, or additional comments.\n\n"
-            "Strictly follow the output format below:\n\n"
-            "Result: <Translated Title or Content in Traditional Chinese>\n\n"
-            "Additionally, please:\n\n"
-            "Retain meaningful paragraphs, comments, driver statements, race highlights, and other relevant content.\n\n"
-            "Remove duplicates, advertisements, embedded videos, meaningless <script> tags, social sharing links, birthday greetings, historical trivia, and any unnecessary sections.\n\n"
-            "Keep the HTML structure tags like <p>, <h3>, <blockquote>, <a>, etc., and do not convert them into plain text.\n\n"
-            "Please output the processed HTML result so I can use it for subsequent organization or conversion.\n\n"
-            "Example:\n\n"
-            "Input:\n"
-            'Verstappen "not very confident" of keeping Piastri behind in F1 Saudi GP.\n\n'
-            "Output:\n"
-            "Result: Verstappen「不太有信心」能在 F1 沙烏地大獎賽中將 Piastri 擋在身後。\n\n"
-            "or\n\n"
-            "Input:\n"
-            "<p>Max Verstappen says he is \"not very confident\" of beating McLaren's Oscar Piastri in Jeddah on Sunday. The reigning world champion's Red Bull <b>claimed pole by a mere 0.010s</b> after the McLarens had looked faster all weekend, with Piastri joining him on the front row. The other McLaren of Lando Norris is starting from 10th after the Briton crashed on his first Q3 lap.</p>....\n\n"
-            "Output:\n"
-            "Result: <p>Max Verstappen 表示，他「沒有太大信心」能在週日的吉達站擊敗 McLaren 車隊的 Oscar Piastri。這位衛冕世界冠軍的 Red Bull 賽車<b>僅以 0.010 秒的微弱優勢奪得桿位</b>，此前 McLaren 車隊在整個週末都顯得更快，Piastri 也加入了他的前排發車。另一輛 McLaren 車隊的 Lando Norris 在 Q3 的第一圈發生撞車事故後，將從第 10 位起跑。</p>...\n\n"
-            "Now, here is the content to translate:\n\n{text}"
-        )
+        def translate_row(row):
+            item = translator.translate_row(row)
+            if item and writer:
+                writer.add(item)
+            return item
 
-        for i, row in enumerate(data):
-            if debug:
-                id = row.setdefault("id", f"debug_{i}")
-                title, title_zh = row.get("title"), row.get("title_zh")
-                content, content_zh = row.get("content"), row.get("content_zh")
-
-                translated_title = title_zh
-                translated_content = content_zh
-
-            else:
-                id = row["id"]
-                title, title_zh = row.get("title"), row.get("title_zh")
-                content, content_zh = row.get("content"), row.get("content_zh")
+        # 多篇文章同時翻譯，速度由 REQUESTS_PER_MINUTE 決定而不是固定的 sleep
+        with ArticleTranslator(cache=cache, edit=edit) as translator, ThreadPoolExecutor(
+            max_workers=max(1, workers)
+        ) as executor:
+            result = [item for item in executor.map(translate_row, data) if item is not None]
 
-                translated_title = title_zh
-                translated_content = content_zh
+        if writer:
+            upload_results = writer.close()
             logging.info(
-                "---------------------------------------------------------------------------------------"
+                f"Uploaded {len(upload_results['data'])} rows, {len(upload_results['failed'])} failed."
             )
-            logging.info(f"Translating title: {title}")
-            try:
-                if not title_zh and title:
-                    translated_title = try_translate(title, prompt1)
-                if not content_zh and content:
-                    translated_content = try_translate(content, prompt2)
-
-                if translated_title and translated_content:
-                    status = "translated"
-                elif translated_title == "null":
-                    status = "title failed"
-                elif translated_content == "null":
-                    status = "content failed"
-                else:
-                    status = "All failed"
-
-                result.append(
-                    {
-                        "id": id,
-                        "title": title,
-                        "title_zh": translated_title or "null",
-                        "content": content,
-                        "content_zh": translated_content or "null",
-                        "translation_status": status,
-                        "link": row.get("link"),
-                    }
-                )
-                if not debug:
-                    upload_to_supabase(
-                        "f1_news",
-                        [result[-1]],
-                        created=False,
-                        updated=True,
-                    )
-
-                logging.info(f"✅ Title '{title}' processed. Status: {status}")
-
-            except Exception as e:
-                logging.error(f"Error processing row {id}: {e}", exc_info=True)
-
-            time.sleep(random.uniform(10, 20))
 
         if debug and output_dir:
             os.makedirs(output_dir, exist_ok=True)
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from chunking import estimate_tokens
+
+# SQLite file that keeps the translated paragraphs between runs
+TRANSLATION_CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH", "data/translation_cache.sqlite3"
+)
+# Least recently used segments are evicted above this many entries
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "50000"))
+
+
+def segment_key(segment):
+    """
+    Cache key of an HTML segment: the SHA-256 of its stripped markup.
+    """
+    return hashlib.sha256(segment.strip().encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Persistent paragraph-level translation cache keyed by content hash.
+    Boilerplate (supporter blurbs, newsletter prompts) and syndicated
+    paragraphs repeat across articles, so they are translated only once.
+
+    Every entry keeps the translation and, once an edit pass has judged it,
+    whether the paragraph is worth keeping (`keep`, NULL when unknown).
+    Safe to share between the translation worker threads.
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, max_entries=TRANSLATION_CACHE_MAX_ENTRIES):
+        self.path = path or ":memory:"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path) if path else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, keep INTEGER, "
+            "last_used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used)"
+        )
+        self.conn.commit()
+
+    def lookup(self, segments, need_keep=False):
+        """
+        Look up the translations of a list of segments.
+
+        Args:
+            segments (list): HTML segments.
+            need_keep (bool): Only count entries whose keep flag is known as hits
+                (the edit pass needs it).
+
+        Returns:
+            dict: segment key -> (translation, keep) for every hit.
+        """
+        keys = list({segment_key(segment): None for segment in segments})
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self.conn.execute(
+                    "SELECT key, translation, keep FROM segments WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, translation, keep in rows:
+                    if need_keep and keep is None:
+                        continue
+                    found[key] = (translation, None if keep is None else bool(keep))
+            if found:
+                self.conn.executemany(
+                    "UPDATE segments SET last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key in found],
+                )
+                self.conn.commit()
+
+            for segment in segments:
+                if segment_key(segment) in found:
+                    self.hits += 1
+                    self.saved_tokens += estimate_tokens(segment)
+                else:
+                    self.misses += 1
+        return found
+
+    def count_shared(self, segments):
+        """
+        Count looked-up segments that missed but were answered by another
+        worker's request in flight as hits: they were not sent either.
+        """
+        with self._lock:
+            self.hits += len(segments)
+            self.misses -= len(segments)
+            self.saved_tokens += sum(estimate_tokens(segment) for segment in segments)
+
+    def store(self, entries):
+        """
+        Save translated segments and evict the least recently used ones
+        above `max_entries`.
+
+        Args:
+            entries (list): (segment, translation, keep) tuples. keep=None leaves
+                a known keep flag untouched.
+        """
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO segments (key, translation, keep, last_used) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "translation = excluded.translation, "
+                "keep = COALESCE(excluded.keep, segments.keep), "
+                "last_used = excluded.last_used",
+                [
+                    (segment_key(segment), translation, keep, now)
+                    for segment, translation, keep in entries
+                ],
+            )
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM segments").fetchone()
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM segments WHERE key IN "
+                    "(SELECT key FROM segments ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self.conn.commit()
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit_rate and the estimated tokens_saved of this run.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "tokens_saved": self.saved_tokens,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logging.info(
+            f"Translation cache: {stats['hits']}/{stats['hits'] + stats['misses']} "
+            f"segments hit ({stats['hit_rate']:.1%}), ~{stats['tokens_saved']} tokens saved."
+        )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -1,56 +1,226 @@
-from supabase import create_client, Client
 import os
-from dotenv import load_dotenv
+import threading
+import time
 import logging
+import requests
 from datetime import datetime, timezone
-import pandas as pd
+from supabase_client import get_supabase
 
-# 加載環境變數
-load_dotenv()
+# 單次 upsert 的最大筆數，超過會切成多個請求
+UPLOAD_CHUNK_SIZE = 500
+# 新聞 API（web.py）的網址與快取失效用的 token，未設定時不通知
+NEWS_API_URL = os.getenv("NEWS_API_URL")
+CACHE_INVALIDATE_TOKEN = os.getenv("CACHE_INVALIDATE_TOKEN")
 
-# 初始化 Supabase 客戶端
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Please set SUPABASE_URL and SUPABASE_KEY environment variables.")
+def notify_news_api(prefix=None):
+    """
+    通知新聞 API 清除回應快取，讓新寫入的資料馬上可以被讀到。
+    Args:
+        prefix (str, optional): 只清除此路徑開頭的快取（例如 "/news/"）。
+    Returns:
+        bool: 是否通知成功。
+    """
+    if not NEWS_API_URL or not CACHE_INVALIDATE_TOKEN:
+        return False
+    try:
+        response = requests.post(
+            f"{NEWS_API_URL.rstrip('/')}/cache/invalidate",
+            params={"prefix": prefix} if prefix else None,
+            headers={"X-Cache-Token": CACHE_INVALIDATE_TOKEN},
+            timeout=10,
+        )
+        response.raise_for_status()
+        logging.info(f"News API cache invalidated: {response.json()}")
+        return True
+    except Exception as e:
+        logging.warning(f"Could not invalidate the news API cache: {e}")
+        return False
+
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def upsert_rows(table_name, rows, on_conflict="link"):
+    """
+    以一個請求 upsert 多筆資料；失敗時改為逐筆 upsert，找出失敗的資料。
+    Args:
+        on_conflict (str): 唯一性約束欄位，多個欄位以逗號分隔。
+    Returns:
+        tuple: (成功寫入的資料列表, 失敗列表 [{"row": ..., "error": ...}])
+    """
+    try:
+        response = (
+            get_supabase()
+            .table(table_name)
+            .upsert(rows, on_conflict=on_conflict)
+            .execute()
+        )
+        if response.data:
+            return response.data, []
+        return [], [
+            {"row": row, "error": "No data returned from Supabase."} for row in rows
+        ]
+    except Exception as e:
+        if len(rows) == 1:
+            return [], [{"row": rows[0], "error": str(e)}]
+        logging.warning(
+            f"Upsert of {len(rows)} rows failed ({e}), retrying row by row."
+        )
+        succeeded, failed = [], []
+        for row in rows:
+            row_succeeded, row_failed = upsert_rows(table_name, [row], on_conflict)
+            succeeded.extend(row_succeeded)
+            failed.extend(row_failed)
+        return succeeded, failed
 
 
-def upload_to_supabase(table_name: str, data: list, created=False, updated=False):
+def upload_to_supabase(
+    table_name: str,
+    data: list,
+    created=False,
+    updated=False,
+    chunk_size=UPLOAD_CHUNK_SIZE,
+    on_conflict="link",
+):
     """
     將多筆資料上傳到 Supabase 資料表，使用 upsert 避免重複資料。
     Args:
         table_name (str): 資料表名稱。
         data (list): 要上傳的資料列表，每筆資料為字典格式。
+        chunk_size (int): 單次請求的最大筆數，較大的資料會切成多個請求。
+        on_conflict (str): 唯一性約束欄位，多個欄位以逗號分隔。
     Returns:
-        dict: 包含成功和失敗的結果。
+        dict: 包含成功和失敗的結果：
+              success (bool): 全部成功才為 True。
+              data (list): 成功寫入的資料。
+              failed (list): 失敗的資料與錯誤訊息 [{"row": ..., "error": ...}]。
     """
-    try:
-        now = datetime.now(timezone.utc).isoformat()
-        df = pd.DataFrame(data)
+    now = datetime.now(timezone.utc).isoformat()
+    for record in data:
         if created:
             # 將 created_at 欄位設置為當前時間
-            for record in data:
-                record["created_at"] = now
+            record["created_at"] = now
         if updated:
             # 將 updated_at 欄位設置為當前時間
-            for record in data:
-                record["updated_at"] = now
+            record["updated_at"] = now
 
+    succeeded, failed = [], []
+    try:
         # 使用 upsert 插入或更新資料，指定唯一性約束欄位
-        response = (
-            supabase.table(table_name).upsert(data, on_conflict=["link"]).execute()
-        )
-
-        # 檢查是否有錯誤
-        if response.data:
-            logging.info("Data uploaded successfully.")
-            return {"success": True, "data": response.data}
-        else:
-            logging.warning("Upload succeeded but returned no data.")
-            return {"success": False, "error": "No data returned from Supabase."}
+        for start in range(0, len(data), chunk_size):
+            chunk_succeeded, chunk_failed = upsert_rows(
+                table_name, data[start : start + chunk_size], on_conflict
+            )
+            succeeded.extend(chunk_succeeded)
+            failed.extend(chunk_failed)
     except Exception as e:
         logging.error(f"Error during upload process: {e}", exc_info=True)
-        return {"success": False, "error": str(e)}
+        uploaded = len(succeeded) + len(failed)
+        failed.extend({"row": row, "error": str(e)} for row in data[uploaded:])
+
+    if failed:
+        logging.warning(
+            f"Uploaded {len(succeeded)} rows, {len(failed)} failed: {failed[0]['error']}"
+        )
+        return {
+            "success": False,
+            "data": succeeded,
+            "failed": failed,
+            "error": failed[0]["error"],
+        }
+    logging.info(f"Data uploaded successfully ({len(succeeded)} rows).")
+    return {"success": True, "data": succeeded, "failed": []}
+
+
+class SupabaseWriter:
+    """
+    緩衝寫入器：累積資料，達到 max_rows 筆或距離上次寫入超過 max_interval 秒時
+    一次 upsert，取代每筆資料一個請求。
+    用法：
+        with SupabaseWriter("f1_news", updated=True) as writer:
+            writer.add(row)
+        writer.results  # 所有成功與失敗的資料
+    """
+
+    def __init__(
+        self,
+        table_name,
+        max_rows=50,
+        max_interval=30.0,
+        created=False,
+        updated=False,
+        chunk_size=UPLOAD_CHUNK_SIZE,
+    ):
+        self.table_name = table_name
+        self.max_rows = max_rows
+        self.max_interval = max_interval
+        self.created = created
+        self.updated = updated
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.results = {"success": True, "data": [], "failed": []}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._timer = None
+
+    def add(self, row):
+        with self._lock:
+            self.buffer.append(row)
+            full = len(self.buffer) >= self.max_rows
+            if self._timer is None and self.max_interval:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        寫入目前緩衝的資料。
+        Returns:
+            dict: 本次寫入的結果，格式同 upload_to_supabase。
+        """
+        with self._lock:
+            rows, self.buffer = self.buffer, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return {"success": True, "data": [], "failed": []}
+            result = upload_to_supabase(
+                self.table_name,
+                rows,
+                created=self.created,
+                updated=self.updated,
+                chunk_size=self.chunk_size,
+            )
+            self.results["data"].extend(result["data"])
+            self.results["failed"].extend(result["failed"])
+            self.results["success"] = not self.results["failed"]
+        return result
+
+    def close(self):
+        """
+        停止計時器並寫入剩下的資料；有寫入資料時通知新聞 API 清除快取。
+        Returns:
+            dict: 所有寫入的結果。
+        """
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+        if self.results["data"]:
+            notify_news_api()
+        return self.results
+
+    def _start_timer(self):
+        def flush_when_idle():
+            while not self._stop.wait(self.max_interval / 2):
+                if self.buffer and time.monotonic() - self._last_flush >= self.max_interval:
+                    self.flush()
+
+        self._timer = threading.Thread(
+            target=flush_when_idle, name="supabase-writer", daemon=True
+        )
+        self._timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,14 +1,32 @@
 # web.py
-from fastapi import FastAPI, HTTPException, Query, Path
+from fastapi import FastAPI, Header, HTTPException, Query, Path, Request
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
+from typing import Optional
+import asyncio
+import base64
+import json
 import logging
+import os
+import threading
+import time
 import traceback
+from supabase_client import get_async_supabase
+from response_cache import ResponseCache, cached_response
+
+# Columns returned for every news card
+NEWS_COLUMNS = "id, title_zh, published_at, author, content_zh, image_url , source"
+# Seconds the total count of translated news is reused
+COUNT_TTL = float(os.getenv("COUNT_TTL", "60"))
+
+# Shared secret of POST /cache/invalidate, the endpoint is disabled without it
+CACHE_INVALIDATE_TOKEN = os.getenv("CACHE_INVALIDATE_TOKEN")
+
+_count_cache = {"value": None, "expires": 0.0}
+_count_lock = threading.Lock()
+
+response_cache = ResponseCache()
 
 app = FastAPI()
-load_dotenv()
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,72 +36,142 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def encode_cursor(row):
+    """
+    Opaque cursor pointing after `row` in (published_at desc, id desc) order.
+    """
+    if not row.get("published_at"):
+        return None
+    raw = json.dumps([row["published_at"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published_at, id = map(str, json.loads(raw))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # The values are quoted inside a PostgREST filter
+    if '"' in published_at or '"' in id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return published_at, id
+
+
+async def translated_count(supabase):
+    """
+    Number of translated news, as shown by /index. Read from the
+    trigger-maintained f1_news_stats table (sql/002_news_stats.sql) and kept
+    for COUNT_TTL seconds; falls back to an exact count of the filtered rows.
+    """
+    with _count_lock:
+        if _count_cache["value"] is not None and time.monotonic() < _count_cache["expires"]:
+            return _count_cache["value"]
+
+    count = None
+    try:
+        rows = (
+            await supabase.table("f1_news_stats")
+            .select("value")
+            .eq("name", "translated_count")
+            .execute()
+        ).data
+        if rows:
+            count = rows[0]["value"]
+    except Exception as e:
+        logging.warning(f"Could not read f1_news_stats: {e}")
+    if count is None:
+        count = (
+            await supabase.table("f1_news")
+            .select("id", count="exact")
+            .eq("translation_status", "translated")
+            .limit(1)
+            .execute()
+        ).count
+
+    with _count_lock:
+        _count_cache["value"] = count
+        _count_cache["expires"] = time.monotonic() + COUNT_TTL
+    return count
+
+
+def invalidate_count():
+    """
+    Drop the cached total count, e.g. after new articles were translated.
+    """
+    with _count_lock:
+        _count_cache["expires"] = 0.0
 
 
 @app.get("/index")
-def get_news(page: int = Query(1, ge=1), page_size: int = Query(20, le=100)):
-    start = (page - 1) * page_size
-    end = start + page_size - 1
-    total_count = supabase.table("f1_news").select("id", count="exact").execute().count
-    response = (
+async def get_news(
+    request: Request,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    return await cached_response(
+        request, response_cache, lambda: load_news_page(page, page_size, cursor)
+    )
+
+
+async def load_news_page(page, page_size, cursor=None):
+    supabase = await get_async_supabase()
+    query = (
         supabase.table("f1_news")
-        .select("id, title_zh, published_at, author, content_zh, image_url , source")
+        .select(NEWS_COLUMNS)
         .eq("translation_status", "translated")
-        .order("published_at", desc=True)
-        .range(start, end)
-        .execute()
     )
-    return {"news": response.data, "total_count": total_count}
+    if cursor:
+        # Keyset pagination: constant cost however deep the page is
+        published_at, id = decode_cursor(cursor)
+        query = query.or_(
+            f'published_at.lt."{published_at}",'
+            f'and(published_at.eq."{published_at}",id.lt."{id}")'
+        )
+        query = query.order("published_at", desc=True).order("id", desc=True).limit(page_size)
+    else:
+        start = (page - 1) * page_size
+        end = start + page_size - 1
+        query = query.order("published_at", desc=True).order("id", desc=True).range(start, end)
+    # 新聞列表與總數互不相依，同時查詢
+    response, total_count = await asyncio.gather(
+        query.execute(), translated_count(supabase)
+    )
+    news = response.data
+
+    next_cursor = encode_cursor(news[-1]) if len(news) == page_size else None
+    return {
+        "news": news,
+        "total_count": total_count,
+        "next_cursor": next_cursor,
+    }
 
 
 @app.get("/news/{id}")
-def get_news_by_id(id: str = Path(..., description="News UUID")):
+async def get_news_by_id(request: Request, id: str = Path(..., description="News UUID")):
+    return await cached_response(request, response_cache, lambda: load_news_detail(id))
+
+
+async def load_news_detail(id):
     try:
         logging.info(f"Received ID: {id}")
+        supabase = await get_async_supabase()
 
-        # 查詢主新聞
-        response = (
-            supabase.table("f1_news")
-            .select("id, title_zh, link, author, content_zh, published_at")
-            .eq("id", id)
-            .execute()
-        )
+        try:
+            # 主新聞與相關新聞一次查回（sql/003_news_detail.sql）
+            detail = (await supabase.rpc("news_detail", {"p_id": id}).execute()).data
+        except Exception as e:
+            logging.warning(f"news_detail RPC failed, falling back to queries: {e}")
+            detail = await load_news_detail_queries(supabase, id)
 
-        if not response.data:
+        if not detail or not detail.get("news"):
             raise HTTPException(status_code=404, detail="News not found")
 
-        main_news = response.data[0]
-
-        # 查詢相關新聞 ID
-        related_response = (
-            supabase.table("related_news")
-            .select("related_news_id")
-            .eq("news_id", id)
-            .execute()
-        )
-
-        related_ids = [item["related_news_id"] for item in related_response.data]
-
-        # 查詢相關新聞詳細資料
-        related_news = []
-        if related_ids:
-            related_news_response = (
-                supabase.table("f1_news")
-                .select(
-                    "id, title_zh, published_at, author, content_zh, image_url , source"
-                )
-                .in_("id", related_ids)
-                .order("published_at", desc=True)
-                .limit(6)
-                .execute()
-            )
-            related_news = related_news_response.data
-
-        # 合併結果
-        return {"news": main_news, "related_news": related_news}
+        return {"news": detail["news"], "related_news": detail["related_news"] or []}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(
             f"An error occurred while fetching the news with ID {id}: {str(e)}"
@@ -92,33 +180,100 @@ def get_news_by_id(id: str = Path(..., description="News UUID")):
         raise HTTPException(status_code=404, detail="Not Found")
 
 
+async def load_news_detail_queries(supabase, id):
+    """
+    Same result as the news_detail RPC without it: the article and the related
+    ids are queried concurrently, then the related articles.
+    """
+    response, related_response = await asyncio.gather(
+        supabase.table("f1_news")
+        .select("id, title_zh, link, author, content_zh, published_at")
+        .eq("id", id)
+        .execute(),
+        supabase.table("related_news")
+        .select("related_news_id")
+        .eq("news_id", id)
+        .execute(),
+    )
+    if not response.data:
+        return None
+
+    related_ids = [item["related_news_id"] for item in related_response.data]
+    related_news = []
+    if related_ids:
+        related_news = (
+            await supabase.table("f1_news")
+            .select(NEWS_COLUMNS)
+            .in_("id", related_ids)
+            .order("published_at", desc=True)
+            .limit(6)
+            .execute()
+        ).data
+    return {"news": response.data[0], "related_news": related_news}
+
+
 @app.get("/health")
-def health_check():
-    return {"health": "working!"}
+async def health_check():
+    return {"health": "working!", "cache": response_cache.stats()}
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(
+    prefix: Optional[str] = None, x_cache_token: Optional[str] = Header(None)
+):
+    """
+    Called by the pipeline (upload_to_supabase.notify_news_api) after it has
+    written new data, so the next requests read fresh results.
+    """
+    if not CACHE_INVALIDATE_TOKEN or x_cache_token != CACHE_INVALIDATE_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    invalidate_count()
+    return {"invalidated": response_cache.invalidate(prefix)}
 
 
 @app.get("/search")
-def search_news(q: str = Query(..., min_length=1), limit: int = 10):
-    # 使用 ilike 進行不區分大小寫的模糊匹配
-    title_query = (
-        supabase.table("f1_news")
-        .select("id, title_zh, published_at, author, content_zh, image_url, source")
-        .ilike("title", f"%{q}%")
-        .eq("translation_status", "translated")
+async def search_news(
+    request: Request, q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)
+):
+    return await cached_response(
+        request, response_cache, lambda: load_search_results(q, limit)
     )
-    content_query = (
+
+
+async def load_search_results(q, limit):
+    supabase = await get_async_supabase()
+    try:
+        # 全文檢索與排序都在資料庫完成，只回傳 limit 筆（sql/004_news_search.sql）
+        return (
+            await supabase.rpc("search_news", {"q": q, "max_results": limit})
+            .select(NEWS_COLUMNS)
+            .execute()
+        ).data
+    except Exception as e:
+        logging.warning(f"search_news RPC failed, falling back to ilike: {e}")
+        return await load_search_results_ilike(supabase, q, limit)
+
+
+async def load_search_results_ilike(supabase, q, limit):
+    """
+    Substring search used when the search_news RPC is not deployed. Each query
+    already returns only its newest `limit` matches.
+    """
+    # 使用 ilike 進行不區分大小寫的模糊匹配
+    queries = [
         supabase.table("f1_news")
-        .select("id, title_zh, published_at, author, content_zh, image_url, source")
-        .ilike("content", f"%{q}%")
+        .select(NEWS_COLUMNS)
+        .ilike(column, f"%{q}%")
         .eq("translation_status", "translated")
-    )
-
-    # 執行查詢
-    title_results = title_query.execute().data
-    content_results = content_query.execute().data
+        .order("published_at", desc=True)
+        .limit(limit)
+        .execute()
+        for column in ("title", "title_zh", "content")
+    ]
+    responses = await asyncio.gather(*queries)
 
     # 合併結果並去重
-    all_results = {item["id"]: item for item in title_results + content_results}
+    all_results = {item["id"]: item for response in responses for item in response.data}
     sorted_results = sorted(
         all_results.values(), key=lambda x: x["published_at"], reverse=True
     )